@@ -0,0 +1,319 @@
+from collections import OrderedDict
+
+from logic import *
+
+# Level of the two terminal nodes, below every variable
+TERMINAL = 1 << 30
+
+
+class BDD():
+    """
+    Reduced ordered binary decision diagram manager.
+
+    Nodes are integers: 0 is the constant False and 1 the constant True.
+    Every other node tests the variable at its level and has a low
+    (variable false) and high (variable true) child. Structurally equal
+    nodes are shared, so two sentences are equivalent exactly when they
+    compile to the same node.
+    """
+
+    FALSE = 0
+    TRUE = 1
+
+    def __init__(self, order=()):
+
+        # Variable names by level, and levels by name
+        self.order = []
+        self.levels = dict()
+        for name in order:
+            self.add_variable(name)
+
+        # Node table, with the terminals at node 0 and 1
+        self.level = [TERMINAL, TERMINAL]
+        self.low = [0, 1]
+        self.high = [0, 1]
+        self.unique = dict()
+        self.cache = dict()
+
+    def add_variable(self, name):
+        """Adds a variable below all existing ones, returning its level."""
+        if name not in self.levels:
+            self.levels[name] = len(self.order)
+            self.order.append(name)
+        return self.levels[name]
+
+    def node(self, level, low, high):
+        """Returns the unique node testing `level` with the given children."""
+        if low == high:
+            return low
+        key = (level, low, high)
+        node = self.unique.get(key)
+        if node is None:
+            node = len(self.level)
+            self.level.append(level)
+            self.low.append(low)
+            self.high.append(high)
+            self.unique[key] = node
+        return node
+
+    def variable(self, name):
+        return self.node(self.add_variable(name), self.FALSE, self.TRUE)
+
+    def known(self, f, g, h):
+        """
+        Returns the node for "if f then g else h" if it is a terminal case
+        or already cached, else None.
+        """
+        if f == self.TRUE:
+            return g
+        if f == self.FALSE:
+            return h
+        if g == h:
+            return g
+        if g == self.TRUE and h == self.FALSE:
+            return f
+        return self.cache.get((f, g, h))
+
+    def ite(self, f, g, h):
+        """
+        Returns the node for "if f then g else h".
+
+        Uses an explicit stack rather than recursion, since the depth
+        grows with the number of variables and would pass Python's
+        recursion limit on knowledge bases with about a thousand symbols.
+        """
+        # Operations to expand, and (f, g, h, level) operations whose two
+        # results are waiting on top of `results`, low before high
+        stack = [(f, g, h)]
+        results = []
+        while stack:
+            operation = stack.pop()
+            if len(operation) == 4:
+                f, g, h, top = operation
+                high = results.pop()
+                low = results.pop()
+                result = self.node(top, low, high)
+                self.cache[(f, g, h)] = result
+                results.append(result)
+                continue
+
+            f, g, h = operation
+            result = self.known(f, g, h)
+            if result is not None:
+                results.append(result)
+                continue
+
+            # Split on the topmost variable of the three operands
+            top = min(self.level[f], self.level[g], self.level[h])
+            f0, f1 = self.cofactors(f, top)
+            g0, g1 = self.cofactors(g, top)
+            h0, h1 = self.cofactors(h, top)
+            stack.append((f, g, h, top))
+            stack.append((f1, g1, h1))
+            stack.append((f0, g0, h0))
+        return results.pop()
+
+    def cofactors(self, f, level):
+        """Returns (f with variable false, f with variable true)."""
+        if self.level[f] != level:
+            return f, f
+        return self.low[f], self.high[f]
+
+    def negate(self, f):
+        return self.ite(f, self.FALSE, self.TRUE)
+
+    def compile(self, sentence):
+        """Returns the node equivalent to a logical sentence."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return self.negate(self.compile(sentence.operand))
+        if isinstance(sentence, And):
+            result = self.TRUE
+            for conjunct in sentence.conjuncts:
+                result = self.ite(result, self.compile(conjunct), self.FALSE)
+                if result == self.FALSE:
+                    break
+            return result
+        if isinstance(sentence, Or):
+            result = self.FALSE
+            for disjunct in sentence.disjuncts:
+                result = self.ite(result, self.TRUE, self.compile(disjunct))
+                if result == self.TRUE:
+                    break
+            return result
+        if isinstance(sentence, Implication):
+            antecedent = self.compile(sentence.antecedent)
+            consequent = self.compile(sentence.consequent)
+            return self.ite(antecedent, consequent, self.TRUE)
+        if isinstance(sentence, Biconditional):
+            left = self.compile(sentence.left)
+            right = self.compile(sentence.right)
+            return self.ite(left, right, self.negate(right))
+        raise TypeError("must be a logical sentence")
+
+    def reachable(self, f):
+        """Returns all non-terminal nodes reachable from f."""
+        seen = set()
+        stack = [f]
+        while stack:
+            node = stack.pop()
+            if node <= self.TRUE or node in seen:
+                continue
+            seen.add(node)
+            stack.append(self.low[node])
+            stack.append(self.high[node])
+        return seen
+
+    def size(self, f):
+        return len(self.reachable(f))
+
+    def count(self, f, n):
+        """
+        Returns the number of models of f over the first n variables,
+        all of whose variables must be among them.
+        """
+
+        def level(node):
+            return n if node <= self.TRUE else self.level[node]
+
+        # Count bottom-up, starting from the deepest level
+        counts = {self.FALSE: 0, self.TRUE: 1}
+        for node in sorted(self.reachable(f), key=level, reverse=True):
+            low, high = self.low[node], self.high[node]
+            counts[node] = (
+                counts[low] << (level(low) - self.level[node] - 1)
+            ) + (
+                counts[high] << (level(high) - self.level[node] - 1)
+            )
+        return counts[f] << level(f)
+
+    def forced(self, f, n):
+        """
+        Returns a dict of variable name -> value for each of the first n
+        variables that has the same value in every model of f.
+        Returns None if f has no models.
+        """
+        if f == self.FALSE:
+            return None
+
+        def level(node):
+            return n if node <= self.TRUE else self.level[node]
+
+        # Values each level can take on some path to True, and the number
+        # of paths that skip each level (recorded as a difference array)
+        can_be_false = [False] * n
+        can_be_true = [False] * n
+        skipped = [0] * (n + 1)
+
+        def skip(start, end):
+            if start < end:
+                skipped[start] += 1
+                skipped[end] -= 1
+
+        skip(0, level(f))
+        for node in self.reachable(f):
+            low, high = self.low[node], self.high[node]
+            if low != self.FALSE:
+                can_be_false[self.level[node]] = True
+                skip(self.level[node] + 1, level(low))
+            if high != self.FALSE:
+                can_be_true[self.level[node]] = True
+                skip(self.level[node] + 1, level(high))
+
+        forced = dict()
+        free = 0
+        for i in range(n):
+            free += skipped[i]
+            if free or can_be_false[i] == can_be_true[i]:
+                continue
+            forced[self.order[i]] = can_be_true[i]
+        return forced
+
+
+def appearance_order(sentence):
+    """Returns the symbol names of sentence in order of first appearance."""
+    order = dict()
+    stack = [sentence]
+    while stack:
+        s = stack.pop()
+        if isinstance(s, Symbol):
+            order.setdefault(s.name, None)
+        elif isinstance(s, Not):
+            stack.append(s.operand)
+        elif isinstance(s, And):
+            stack.extend(reversed(s.conjuncts))
+        elif isinstance(s, Or):
+            stack.extend(reversed(s.disjuncts))
+        elif isinstance(s, Implication):
+            stack.extend([s.consequent, s.antecedent])
+        elif isinstance(s, Biconditional):
+            stack.extend([s.right, s.left])
+    return list(order)
+
+
+class CompiledKnowledge():
+    """
+    A knowledge base compiled into a BDD. Model counting and forced
+    literals take time linear in the size of the BDD; entailment and
+    consistency checks reuse the manager's operation cache, so repeated
+    queries do not redo work.
+    """
+
+    def __init__(self, knowledge, order=None):
+        if order is None:
+            order = appearance_order(knowledge)
+        self.bdd = BDD(order)
+        self.root = self.bdd.compile(knowledge)
+
+        # Symbols of the knowledge base occupy the first levels
+        self.n = len(self.bdd.order)
+
+    def size(self):
+        return self.bdd.size(self.root)
+
+    def model_count(self):
+        """Number of models over the symbols of the knowledge base."""
+        return self.bdd.count(self.root, self.n)
+
+    def forced_literals(self):
+        """Dict of symbol name -> value forced by the knowledge base."""
+        return self.bdd.forced(self.root, self.n)
+
+    def entails(self, query):
+        query = self.bdd.compile(query)
+        return self.bdd.ite(self.root, query, self.bdd.TRUE) == self.bdd.TRUE
+
+    def consistent(self, sentence):
+        sentence = self.bdd.compile(sentence)
+        both = self.bdd.ite(self.root, sentence, self.bdd.FALSE)
+        return both != self.bdd.FALSE
+
+
+# Most recently used compiled knowledge bases, by formula and variable order
+compiled = OrderedDict()
+COMPILED_LIMIT = 16
+
+
+def compile_knowledge(knowledge, order=None):
+    """
+    Returns the compiled form of knowledge, reusing an earlier compilation
+    of the same knowledge base with the same variable order. Knowledge
+    bases are matched by their formula, so adding to one after compiling
+    it does not return the old compilation. Only the last COMPILED_LIMIT
+    compilations are kept; callers asking many questions of a knowledge
+    base can keep its CompiledKnowledge instead.
+    """
+    key = (knowledge.formula(), None if order is None else tuple(order))
+    if key in compiled:
+        compiled.move_to_end(key)
+    else:
+        compiled[key] = CompiledKnowledge(knowledge, order)
+        if len(compiled) > COMPILED_LIMIT:
+            compiled.popitem(last=False)
+    return compiled[key]
+
+
+def bdd_model_check(knowledge, query):
+    """Checks if knowledge base entails query, like logic.model_check."""
+    return compile_knowledge(knowledge).entails(query)
@@ -0,0 +1,181 @@
+import argparse
+import random
+import time
+import tracemalloc
+
+import bdd
+from logic import *
+
+
+def knights_and_knaves(n, m, seed=None):
+    """
+    Generates a knights-and-knaves puzzle with n characters and m
+    statements, encoded like the puzzles in puzzle.py.
+    Returns the knowledge base and the list of symbols to query.
+
+    Statements are drawn at random and made consistent with a hidden
+    assignment of roles, so every puzzle has at least one solution.
+    """
+    rng = random.Random(seed)
+    knights = [Symbol(f"P{i} is a Knight") for i in range(n)]
+    knaves = [Symbol(f"P{i} is a Knave") for i in range(n)]
+    hidden = {
+        knight.name: rng.random() < 0.5 for knight in knights
+    }
+    for knight, knave in zip(knights, knaves):
+        hidden[knave.name] = not hidden[knight.name]
+
+    # Every character is either a knight or a knave, but not both
+    knowledge = And()
+    for knight, knave in zip(knights, knaves):
+        knowledge.add(Or(knight, knave))
+        knowledge.add(Not(And(knight, knave)))
+
+    claims = [
+        lambda x, y: knights[x],
+        lambda x, y: knaves[x],
+        lambda x, y: And(knaves[x], knaves[y]),
+        lambda x, y: Or(knaves[x], knaves[y]),
+        lambda x, y: Or(And(knights[x], knights[y]),
+                        And(knaves[x], knaves[y])),
+        lambda x, y: Or(And(knights[x], knaves[y]),
+                        And(knaves[x], knights[y])),
+    ]
+    for _ in range(m):
+        speaker = rng.randrange(n)
+        x, y = rng.randrange(n), rng.randrange(n)
+        claim = rng.choice(claims)(x, y)
+
+        # Knights only say true things, knaves only false ones
+        if claim.evaluate(hidden) != hidden[knights[speaker].name]:
+            claim = Not(claim)
+        knowledge.add(Implication(knights[speaker], claim))
+        knowledge.add(Implication(knaves[speaker], Not(claim)))
+
+    symbols = [s for pair in zip(knights, knaves) for s in pair]
+    return knowledge, symbols
+
+
+def random_ksat(n, m, k=3, seed=None):
+    """
+    Generates a random k-SAT instance with n variables and m clauses.
+    Returns the knowledge base and the list of symbols to query.
+    """
+    rng = random.Random(seed)
+    symbols = [Symbol(f"x{i}") for i in range(1, n + 1)]
+    knowledge = And()
+    for _ in range(m):
+        literals = [
+            symbol if rng.random() < 0.5 else Not(symbol)
+            for symbol in rng.sample(symbols, min(k, n))
+        ]
+        knowledge.add(Or(*literals))
+    return knowledge, symbols
+
+
+def run_model_check(knowledge, queries, prune=True, split=0):
+    nodes, depth = 0, 0
+    results = []
+    for query in queries:
+        stats = dict()
+        results.append(model_check(knowledge, query, prune=prune,
+                                   stats=stats, split=split))
+        nodes += stats["nodes"]
+        depth = max(depth, stats["depth"])
+    return results, {"nodes": nodes, "depth": depth}
+
+
+def run_bdd(knowledge, queries):
+    compiled = bdd.CompiledKnowledge(knowledge)
+    results = [compiled.entails(query) for query in queries]
+    return results, {"nodes": compiled.size(), "depth": compiled.n}
+
+
+BACKENDS = {
+    "model_check": lambda kb, queries, split: run_model_check(
+        kb, queries, split=split),
+    "exhaustive": lambda kb, queries, split: run_model_check(
+        kb, queries, prune=False, split=split),
+    "bdd": lambda kb, queries, split: run_bdd(kb, queries),
+}
+
+
+def measure(backend, knowledge, queries, split=0, memory=False):
+    """
+    Runs a backend over all queries.
+    Returns the results, elapsed seconds, peak traced memory in bytes
+    (0 unless memory is set), and the backend's node count and depth
+    (recursion depth for model_check, number of BDD levels for bdd).
+    Tracing slows backends down by how much they allocate, so the peak
+    comes from a second run that is not timed.
+    """
+    start = time.perf_counter()
+    results, stats = BACKENDS[backend](knowledge, queries, split)
+    elapsed = time.perf_counter() - start
+
+    peak = 0
+    if memory:
+        tracemalloc.start()
+        BACKENDS[backend](knowledge, queries, split)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return results, elapsed, peak, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time logic backends on generated knowledge bases.")
+    parser.add_argument("--kind", choices=["puzzle", "ksat"],
+                        default="puzzle")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[2, 4, 6, 8, 10],
+                        help="characters (puzzle) or variables (ksat)")
+    parser.add_argument("--ratio", type=float, default=None,
+                        help="statements per character (default 1.5) "
+                             "or clauses per variable (default 4.26)")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=4,
+                        help="number of symbols to query")
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS),
+                        default=list(BACKENDS))
+    parser.add_argument("--max-exhaustive", type=int, default=16,
+                        help="largest symbol count for the exhaustive "
+                             "backend")
+    parser.add_argument("--split", type=int, default=0,
+                        help="symbols to split model checking on "
+                             "across processes")
+    parser.add_argument("--memory", action="store_true",
+                        help="trace peak memory in a second, untimed run")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'size':>6} {'symbols':>8} {'backend':>12} {'seconds':>10} "
+          f"{'peak KiB':>10} {'nodes':>10} {'depth':>6}  agree")
+    for size in args.sizes:
+        if args.kind == "puzzle":
+            ratio = 1.5 if args.ratio is None else args.ratio
+            knowledge, symbols = knights_and_knaves(
+                size, round(size * ratio), seed=args.seed)
+        else:
+            ratio = 4.26 if args.ratio is None else args.ratio
+            knowledge, symbols = random_ksat(
+                size, round(size * ratio), k=args.k, seed=args.seed)
+        queries = symbols[:args.queries]
+
+        expected = None
+        for backend in args.backends:
+            if (backend == "exhaustive"
+                    and len(symbols) > args.max_exhaustive):
+                continue
+            results, elapsed, peak, stats = measure(
+                backend, knowledge, queries, args.split, args.memory)
+            if expected is None:
+                expected = results
+            print(f"{size:>6} {len(symbols):>8} {backend:>12} "
+                  f"{elapsed:>10.4f} {peak / 1024:>10.1f} "
+                  f"{stats['nodes']:>10} {stats['depth']:>6}  "
+                  f"{results == expected}")
+
+
+if __name__ == "__main__":
+    main()
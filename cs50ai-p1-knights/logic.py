@@ -1,4 +1,5 @@
 import itertools
+import multiprocessing
 
 
 class Sentence():
@@ -7,6 +8,14 @@ class Sentence():
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_partial(self, model):
+        """
+        Evaluates the logical sentence under a partial model.
+        Returns True or False if the value is decided by the symbols
+        assigned in model, or None (unknown) otherwise.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
@@ -64,6 +73,10 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_partial(self, model):
+        value = model.get(self.name)
+        return None if value is None else bool(value)
+
     def formula(self):
         return self.name
 
@@ -88,6 +101,10 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def evaluate_partial(self, model):
+        value = self.operand.evaluate_partial(model)
+        return None if value is None else not value
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
@@ -122,6 +139,16 @@ class And(Sentence):
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def evaluate_partial(self, model):
+        result = True
+        for conjunct in self.conjuncts:
+            value = conjunct.evaluate_partial(model)
+            if value is False:
+                return False
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
@@ -153,6 +180,16 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def evaluate_partial(self, model):
+        result = False
+        for disjunct in self.disjuncts:
+            value = disjunct.evaluate_partial(model)
+            if value is True:
+                return True
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
@@ -185,6 +222,17 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def evaluate_partial(self, model):
+        antecedent = self.antecedent.evaluate_partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.evaluate_partial(model)
+        if consequent is True:
+            return True
+        if antecedent is True and consequent is False:
+            return False
+        return None
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
@@ -218,48 +266,135 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
+    def evaluate_partial(self, model):
+        left = self.left.evaluate_partial(model)
+        if left is None:
+            return None
+        right = self.right.evaluate_partial(model)
+        if right is None:
+            return None
+        return left == right
+
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+def check_all(knowledge, query, symbols, model, prune=True, stats=None):
+    """
+    Checks if knowledge base entails query, given a particular model.
 
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
+    With prune set, partial models are evaluated with three-valued logic,
+    and a branch is cut off as soon as it falsifies the knowledge base or
+    decides the query. If stats is a dict, every visited node of the
+    search tree is counted under "nodes", and the deepest recursion
+    reached is kept under "depth".
+    """
 
-        # If model has an assignment for each symbol
-        if not symbols:
+    if stats is not None:
+        stats["nodes"] += 1
+        stats["depth"] = max(stats.get("depth", 0), len(model) + 1)
 
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
-        else:
+    if prune and symbols:
+        kb = knowledge.evaluate_partial(model)
 
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
+        # No extension of the model satisfies the knowledge base
+        if kb is False:
+            return True
 
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
+        q = query.evaluate_partial(model)
 
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
+        # Every extension of the model satisfies the query
+        if q is True:
+            return True
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+        # Every extension of the model is a counter-model
+        if kb is True and q is False:
+            return False
+
+    # If model has an assignment for each symbol
+    if not symbols:
+
+        # If knowledge base is true in model, then query must also be true
+        if knowledge.evaluate(model):
+            return query.evaluate(model)
+        return True
+    else:
+
+        # Choose one of the remaining unused symbols
+        remaining = symbols.copy()
+        p = remaining.pop()
+
+        # Create a model where the symbol is true
+        model_true = model.copy()
+        model_true[p] = True
+
+        # Create a model where the symbol is false
+        model_false = model.copy()
+        model_false[p] = False
+
+        # Ensure entailment holds in both models
+        return (check_all(knowledge, query, remaining, model_true,
+                          prune, stats) and
+                check_all(knowledge, query, remaining, model_false,
+                          prune, stats))
+
+
+def check_cube(args):
+    """
+    Worker for parallel model checking: checks entailment in the sub-cube
+    of the model space given by a partial model.
+    Returns the result together with the search statistics.
+    """
+    knowledge, query, symbols, model, prune = args
+    stats = {"nodes": 0, "depth": 0}
+    entailed = check_all(knowledge, query, symbols, model, prune, stats)
+    return entailed, stats
+
+
+def model_check(knowledge, query, prune=True, stats=None,
+                split=0, processes=None):
+    """
+    Checks if knowledge base entails query.
+
+    prune and stats are passed on to check_all; with a split, stats holds
+    the nodes visited by all workers that reported back.
+    If split is positive, the model space is divided on the first `split`
+    symbols, and each of the 2^split sub-cubes is checked in a pool of
+    `processes` worker processes (defaults to the number of CPUs).
+    Checking stops as soon as any worker finds a counter-model.
+    """
+
+    if stats is not None:
+        stats["nodes"] = 0
+        stats["depth"] = 0
 
     # Get all symbols in both knowledge and query
     symbols = set.union(knowledge.symbols(), query.symbols())
 
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    if split <= 0:
+
+        # Check that knowledge entails query
+        return check_all(knowledge, query, symbols, dict(), prune, stats)
+
+    # Assign every combination of truth values to the split symbols
+    fixed = sorted(symbols)[:split]
+    remaining = symbols - set(fixed)
+    cubes = [
+        (knowledge, query, remaining, dict(zip(fixed, values)), prune)
+        for values in itertools.product((True, False), repeat=len(fixed))
+    ]
+
+    # Leaving the pool terminates any workers still running
+    with multiprocessing.Pool(processes) as pool:
+        for entailed, cube in pool.imap_unordered(check_cube, cubes):
+            if stats is not None:
+                stats["nodes"] += cube["nodes"]
+                stats["depth"] = max(stats["depth"], cube["depth"])
+            if not entailed:
+                return False
+    return True
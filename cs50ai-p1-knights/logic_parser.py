@@ -0,0 +1,250 @@
+import re
+
+from logic import *
+
+# Operators of the formula() syntax, with ASCII alternatives
+NOT = {"¬", "~"}
+AND = {"∧", "&"}
+OR = {"∨", "|"}
+IMPLIES = "=>"
+IFF = "<=>"
+
+TOKENS = re.compile(r"(<=>|=>|[()¬~∧&∨|])")
+
+
+class ParseError(ValueError):
+    pass
+
+
+def tokenize(text):
+    """
+    Splits a formula into operators, parentheses and symbol names.
+    Symbol names may contain spaces, as in "A is a Knight".
+    """
+    tokens = []
+    for token in TOKENS.split(text):
+        token = token.strip()
+        if token:
+            tokens.append(token)
+    return tokens
+
+
+def parse(text, symbols=None):
+    """
+    Parses a formula in the syntax produced by Sentence.formula() into a
+    Sentence. From tightest to loosest binding, the operators are
+    ¬, ∧, ∨, => (right associative) and <=>.
+
+    `symbols` may be a dict of name -> Symbol that is reused and extended,
+    so that every occurrence of a name shares one Symbol object.
+    """
+    tokens = tokenize(text)
+    if symbols is None:
+        symbols = dict()
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def advance():
+        nonlocal position
+        token = peek()
+        if token is None:
+            raise ParseError("unexpected end of formula")
+        position += 1
+        return token
+
+    def biconditional():
+        left = implication()
+        while peek() == IFF:
+            advance()
+            left = Biconditional(left, implication())
+        return left
+
+    def implication():
+        antecedent = disjunction()
+        if peek() == IMPLIES:
+            advance()
+            return Implication(antecedent, implication())
+        return antecedent
+
+    def disjunction():
+        disjuncts = [conjunction()]
+        while peek() in OR:
+            advance()
+            disjuncts.append(conjunction())
+        return disjuncts[0] if len(disjuncts) == 1 else Or(*disjuncts)
+
+    def conjunction():
+        conjuncts = [unary()]
+        while peek() in AND:
+            advance()
+            conjuncts.append(unary())
+        return conjuncts[0] if len(conjuncts) == 1 else And(*conjuncts)
+
+    def unary():
+        token = advance()
+        if token in NOT:
+            return Not(unary())
+        if token == "(":
+            sentence = biconditional()
+            if advance() != ")":
+                raise ParseError(f"expected ')' at token {position}")
+            return sentence
+        if token in {")", IMPLIES, IFF} or token in AND or token in OR:
+            raise ParseError(f"unexpected '{token}' at token {position}")
+        if token not in symbols:
+            symbols[token] = Symbol(token)
+        return symbols[token]
+
+    sentence = biconditional()
+    if peek() is not None:
+        raise ParseError(f"unexpected '{peek()}' at token {position}")
+    return sentence
+
+
+def load_dimacs(filename):
+    """
+    Loads a CNF formula from a DIMACS file into an And of Or clauses.
+    Variables are named by "c var <n> <name>" comments if present
+    (as written by save_dimacs), and "x<n>" otherwise.
+    """
+    names = dict()
+    numbers = []
+    with open(filename) as f:
+        for line in f:
+            if line.startswith("c"):
+                fields = line.split(maxsplit=3)
+                if len(fields) == 4 and fields[1] == "var":
+                    names[int(fields[2])] = fields[3].rstrip("\n")
+            elif line.startswith("p"):
+                fields = line.split()
+                if len(fields) != 4 or fields[1] != "cnf":
+                    raise ParseError(f"bad problem line: {line.strip()}")
+            elif line.startswith("%"):
+                # SATLIB files end with "%" and a stray "0" line
+                break
+            else:
+                fields = line.split()
+                if fields == ["0"] and (not numbers or numbers[-1] == "0"):
+                    # A lone terminator with no clause to end
+                    continue
+                numbers.extend(fields)
+
+    symbols = dict()
+
+    def literal(n):
+        variable = abs(n)
+        if variable not in symbols:
+            symbols[variable] = Symbol(names.get(variable, f"x{variable}"))
+        return symbols[variable] if n > 0 else Not(symbols[variable])
+
+    clauses = []
+    clause = []
+    for number in numbers:
+        n = int(number)
+        if n != 0:
+            clause.append(literal(n))
+        elif clause:
+            clauses.append(Or(*clause))
+            clause = []
+        else:
+            raise ParseError("empty clause")
+    if clause:
+        clauses.append(Or(*clause))
+    return And(*clauses)
+
+
+def cnf_clauses(sentence, variables):
+    """
+    Returns a list of clauses (lists of non-zero ints) for sentence and
+    the number of variables used, numbering symbols through the dict
+    `variables` of name -> int.
+    Conjuncts that are already clauses are kept as they are; anything
+    else is Tseitin-encoded with fresh auxiliary variables, which keeps
+    satisfiability but not the model count.
+    """
+
+    def variable(name):
+        if name not in variables:
+            variables[name] = len(variables) + 1
+        return variables[name]
+
+    def literal(s):
+        if isinstance(s, Symbol):
+            return variable(s.name)
+        if isinstance(s, Not) and isinstance(s.operand, Symbol):
+            return -variable(s.operand.name)
+        return None
+
+    def clause(s):
+        if isinstance(s, Or):
+            literals = [literal(disjunct) for disjunct in s.disjuncts]
+            return None if None in literals else literals
+        lit = literal(s)
+        return None if lit is None else [lit]
+
+    # Number the symbols first, so auxiliary variables come last
+    for name in sorted(sentence.symbols()):
+        variable(name)
+    count = len(variables)
+
+    clauses = []
+    encoded = dict()
+
+    def tseitin(s):
+        """Returns a literal equivalent to s, adding defining clauses."""
+        nonlocal count
+        lit = literal(s)
+        if lit is not None:
+            return lit
+        if id(s) in encoded:
+            return encoded[id(s)]
+        count += 1
+        v = count
+        if isinstance(s, Not):
+            x = tseitin(s.operand)
+            clauses.extend([[-v, -x], [v, x]])
+        elif isinstance(s, And):
+            xs = [tseitin(conjunct) for conjunct in s.conjuncts]
+            clauses.extend([-v, x] for x in xs)
+            clauses.append([v] + [-x for x in xs])
+        elif isinstance(s, Or):
+            xs = [tseitin(disjunct) for disjunct in s.disjuncts]
+            clauses.extend([v, -x] for x in xs)
+            clauses.append([-v] + xs)
+        elif isinstance(s, Implication):
+            a, b = tseitin(s.antecedent), tseitin(s.consequent)
+            clauses.extend([[-v, -a, b], [v, a], [v, -b]])
+        elif isinstance(s, Biconditional):
+            a, b = tseitin(s.left), tseitin(s.right)
+            clauses.extend([[-v, -a, b], [-v, a, -b],
+                            [v, a, b], [v, -a, -b]])
+        else:
+            raise TypeError(f"cannot encode {type(s).__name__}")
+        encoded[id(s)] = v
+        return v
+
+    conjuncts = sentence.conjuncts if isinstance(sentence, And) else [sentence]
+    for conjunct in conjuncts:
+        literals = clause(conjunct)
+        if literals is None:
+            literals = [tseitin(conjunct)]
+        clauses.append(literals)
+    return clauses, count
+
+
+def save_dimacs(sentence, filename):
+    """
+    Saves sentence to a DIMACS CNF file, with a "c var <n> <name>"
+    comment for every symbol. Returns the dict of name -> variable number.
+    """
+    variables = dict()
+    clauses, count = cnf_clauses(sentence, variables)
+    with open(filename, "w") as f:
+        for name, n in variables.items():
+            f.write(f"c var {n} {name}\n")
+        f.write(f"p cnf {count} {len(clauses)}\n")
+        for literals in clauses:
+            f.write(" ".join(map(str, literals)) + " 0\n")
+    return variables
@@ -1,4 +1,57 @@
+import json
 import random
+import time
+from array import array
+from collections import deque
+from functools import lru_cache
+
+from probability import MineProbabilities
+
+
+class Grid:
+    """
+    Neighbor table for a board of a given size.
+
+    Cells are addressed by flat index i * width + j. The offsets from a
+    cell to its neighbors only depend on which board edges the cell
+    touches, so the table holds one tuple of offsets for each edge case
+    rather than one entry per cell.
+    """
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.offsets = dict()
+        for top in (False, True):
+            for bottom in (False, True):
+                for left in (False, True):
+                    for right in (False, True):
+                        self.offsets[top, bottom, left, right] = tuple(
+                            di * width + dj
+                            for di in (-1, 0, 1) for dj in (-1, 0, 1)
+                            if (di or dj)
+                            and not (top and di < 0 or bottom and di > 0
+                                     or left and dj < 0 or right and dj > 0)
+                        )
+
+    def neighbors(self, index):
+        """Returns the flat indices of all cells next to a flat index."""
+        i, j = divmod(index, self.width)
+        key = (i == 0, i == self.height - 1, j == 0, j == self.width - 1)
+        return [index + offset for offset in self.offsets[key]]
+
+    def cell_neighbors(self, cell):
+        """Returns the set of all cells next to a cell."""
+        return {
+            divmod(index, self.width)
+            for index in self.neighbors(cell[0] * self.width + cell[1])
+        }
+
+
+@lru_cache(maxsize=16)
+def grid(height, width):
+    """Returns the neighbor table shared by all boards of one size."""
+    return Grid(height, width)
 
 
 class Minesweeper():
@@ -13,21 +66,23 @@ class Minesweeper():
         self.width = width
         self.mines = set()
 
-        # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
+        # Initialize an empty field with no mines, one byte per cell
+        self.board = bytearray(height * width)
 
         # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        for index in random.sample(range(height * width), mines):
+            self.mines.add(divmod(index, width))
+            self.board[index] = 1
+
+        # Count the mines next to every cell once, up front
+        self.grid = grid(height, width)
+        self.counts = bytearray(height * width)
+        for i, j in self.mines:
+            for index in self.grid.neighbors(i * width + j):
+                self.counts[index] += 1
+
+        # Cells uncovered by reveal
+        self.revealed = bytearray(height * width)
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -40,7 +95,7 @@ class Minesweeper():
         for i in range(self.height):
             print("--" * self.width + "-")
             for j in range(self.width):
-                if self.board[i][j]:
+                if self.board[i * self.width + j]:
                     print("|X", end="")
                 else:
                     print("| ", end="")
@@ -49,7 +104,7 @@ class Minesweeper():
 
     def is_mine(self, cell):
         i, j = cell
-        return self.board[i][j]
+        return bool(self.board[i * self.width + j])
 
     def nearby_mines(self, cell):
         """
@@ -57,24 +112,41 @@ class Minesweeper():
         within one row and column of a given cell,
         not including the cell itself.
         """
+        i, j = cell
+        return self.counts[i * self.width + j]
 
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
+    def reveal(self, cell):
+        """
+        Uncovers a cell that is not a mine. If no mines are next to it,
+        its neighbors are uncovered too, and so on through the whole
+        region of cells without nearby mines.
+        Returns a list of (cell, nearby mines) for every newly uncovered
+        cell.
+        """
+        start = cell[0] * self.width + cell[1]
+        if self.revealed[start]:
+            return []
+        self.revealed[start] = 1
+        uncovered = [start]
+
+        # Expand the region one layer at a time
+        layer = [start]
+        while layer:
+            next_layer = []
+            for index in layer:
+                if self.counts[index]:
                     continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+                for neighbor in self.grid.neighbors(index):
+                    if not self.revealed[neighbor]:
+                        self.revealed[neighbor] = 1
+                        uncovered.append(neighbor)
+                        next_layer.append(neighbor)
+            layer = next_layer
+
+        return [
+            (divmod(index, self.width), self.counts[index])
+            for index in uncovered
+        ]
 
     def won(self):
         """
@@ -100,6 +172,27 @@ class Sentence:
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
+    def __len__(self):
+        return len(self.cells)
+
+    def key(self):
+        """Returns a hashable key identifying the sentence's content."""
+        return frozenset(self.cells), self.count
+
+    def issubset(self, other):
+        """
+        Returns True if all cells of this sentence are cells of other.
+        """
+        return self.cells <= other.cells
+
+    def subtract(self, other):
+        """
+        Removes the cells of other from this sentence, along with the
+        mines they contain. other must be a subset of this sentence.
+        """
+        self.cells -= other.cells
+        self.count -= other.count
+
     def known_mines(self):
         """
         Returns the set of all cells in self.cells known to be mines.
@@ -132,16 +225,280 @@ class Sentence:
             self.cells.remove(cell)
 
 
+class BitSentence:
+    """
+    Sentence that stores its cells as an int bitmask.
+    Cell (i, j) is bit i * width + j of the flattened board. The mask is
+    kept shifted down by an offset, its lowest cell, so sentences about
+    a small neighborhood stay small integers even on huge boards.
+    The cells and their number are decoded from the mask once, and kept
+    until the mask changes.
+    """
+
+    def __init__(self, cells, count, width):
+        self.width = width
+        self.count = count
+        self.offset = 0
+        self.mask = 0
+        self.decoded = None
+        self.size = None
+        bits = [i * width + j for i, j in cells]
+        if bits:
+            self.offset = min(bits)
+            for bit in bits:
+                self.mask |= 1 << (bit - self.offset)
+
+    def __eq__(self, other):
+        return (self.offset == other.offset and self.mask == other.mask
+                and self.count == other.count)
+
+    def __str__(self):
+        return f"{self.cells} = {self.count}"
+
+    def __len__(self):
+        if self.size is None:
+            self.size = bin(self.mask).count("1")
+        return self.size
+
+    def key(self):
+        return self.offset, self.mask, self.count
+
+    @property
+    def cells(self):
+        if self.decoded is None:
+            cells = set()
+            mask = self.mask
+            while mask:
+                low = mask & -mask
+                cells.add(divmod(self.offset + low.bit_length() - 1, self.width))
+                mask ^= low
+            self.decoded = frozenset(cells)
+        return self.decoded
+
+    def normalize(self):
+        """
+        Shifts the mask so that its lowest cell is bit 0, and forgets the
+        decoded cells.
+        """
+        self.decoded = None
+        self.size = None
+        if self.mask == 0:
+            self.offset = 0
+            return
+        shift = (self.mask & -self.mask).bit_length() - 1
+        self.mask >>= shift
+        self.offset += shift
+
+    def aligned(self, other):
+        """Returns both masks shifted to the lower of the two offsets."""
+        base = min(self.offset, other.offset)
+        return (self.mask << (self.offset - base),
+                other.mask << (other.offset - base), base)
+
+    def issubset(self, other):
+        mask, other_mask, _ = self.aligned(other)
+        return mask & ~other_mask == 0
+
+    def subtract(self, other):
+        mask, other_mask, base = self.aligned(other)
+        self.mask = mask & ~other_mask
+        self.offset = base
+        self.count -= other.count
+        self.normalize()
+
+    def known_mines(self):
+        return self.cells if len(self) == self.count else frozenset()
+
+    def known_safes(self):
+        return self.cells if self.count == 0 else frozenset()
+
+    def remove(self, cell):
+        """Removes cell from the mask, returning whether it was present."""
+        bit = cell[0] * self.width + cell[1] - self.offset
+        if bit < 0 or not self.mask >> bit & 1:
+            return False
+        self.mask ^= 1 << bit
+        self.normalize()
+        return True
+
+    def mark_mine(self, cell):
+        if self.remove(cell):
+            self.count -= 1
+
+    def mark_safe(self, cell):
+        self.remove(cell)
+
+
+class KnowledgeBase:
+    """
+    Set of sentences known to be true, without duplicates.
+
+    Sentences are stored by their content key, so a sentence that is
+    already known is not added twice. Empty sentences are never stored,
+    and sentences whose cells are all determined carry no information
+    beyond marking those cells, so they are only stored if asked for,
+    and are then handed out once by `resolved`.
+    Sentences are also kept in buckets by size and indexed by cell, so
+    both orders of lookup stay cheap.
+
+    A stored sentence must be removed before it is changed, and added
+    back afterwards, since its key depends on its content.
+    """
+
+    def __init__(self):
+        self.sentences = dict()
+        self.buckets = dict()
+        self.index = dict()
+        self.resolved_keys = set()
+
+    def __len__(self):
+        return len(self.sentences)
+
+    def __iter__(self):
+        """Iterates over the sentences from smallest to largest."""
+        for size in sorted(self.buckets):
+            for key in list(self.buckets[size]):
+                yield self.sentences[key]
+
+    def __contains__(self, sentence):
+        return sentence.key() in self.sentences
+
+    def stores(self, sentence):
+        """Returns whether this very sentence object is stored."""
+        return self.sentences.get(sentence.key()) is sentence
+
+    def add(self, sentence, resolved=False):
+        """
+        Adds a sentence, unless it is empty, already known, or fully
+        resolved and `resolved` is not set. Returns whether the sentence
+        was stored.
+        """
+        size = len(sentence)
+        if not size or (not resolved and (
+                sentence.known_mines() or sentence.known_safes())):
+            return False
+        key = sentence.key()
+        if key in self.sentences:
+            return False
+        if sentence.known_mines() or sentence.known_safes():
+            self.resolved_keys.add(key)
+        self.sentences[key] = sentence
+        self.buckets.setdefault(size, set()).add(key)
+        for cell in sentence.cells:
+            self.index.setdefault(cell, set()).add(key)
+        return True
+
+    def remove(self, sentence):
+        key = sentence.key()
+        del self.sentences[key]
+        self.resolved_keys.discard(key)
+        bucket = self.buckets[len(sentence)]
+        bucket.discard(key)
+        if not bucket:
+            del self.buckets[len(sentence)]
+        for cell in sentence.cells:
+            keys = self.index[cell]
+            keys.discard(key)
+            if not keys:
+                del self.index[cell]
+
+    def resolved(self):
+        """
+        Returns the stored sentences that determine all of their cells
+        and have not been returned before.
+        """
+        sentences = [self.sentences[key] for key in self.resolved_keys]
+        self.resolved_keys.clear()
+        return sentences
+
+    def containing(self, cell):
+        """Returns all sentences that mention cell."""
+        return [self.sentences[key] for key in self.index.get(cell, ())]
+
+    def related(self, sentence):
+        """
+        Returns all other sentences that share at least one cell
+        with sentence.
+        """
+        own = sentence.key()
+        keys = set()
+        for cell in sentence.cells:
+            keys.update(self.index.get(cell, ()))
+        keys.discard(own)
+        return [self.sentences[key] for key in keys]
+
+
+class CellPool:
+    """
+    Set of board cells that supports removal and uniform random sampling
+    in constant time. Cells are stored as flat indices in an array,
+    with a second array holding each cell's position in the first.
+    """
+
+    def __init__(self, height, width, full=True):
+        self.width = width
+        size = height * width if full else 0
+        self.cells = array("l", range(size))
+        if full:
+            self.positions = array("l", range(height * width))
+        else:
+            self.positions = array("l", [-1]) * (height * width)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return self.positions[cell[0] * self.width + cell[1]] >= 0
+
+    def add(self, cell):
+        index = cell[0] * self.width + cell[1]
+        if self.positions[index] < 0:
+            self.positions[index] = len(self.cells)
+            self.cells.append(index)
+
+    def discard(self, cell):
+        index = cell[0] * self.width + cell[1]
+        position = self.positions[index]
+        if position < 0:
+            return
+
+        # Move the last cell into the freed position
+        last = self.cells.pop()
+        if last != index:
+            self.cells[position] = last
+            self.positions[last] = position
+        self.positions[index] = -1
+
+    def sample(self):
+        """Returns a random cell from the pool."""
+        return divmod(self.cells[random.randrange(len(self.cells))],
+                      self.width)
+
+    def __iter__(self):
+        return (divmod(index, self.width) for index in self.cells)
+
+
 class MinesweeperAI():
     """
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, bitset=False, mines=None,
+                 max_component=40, profile=False):
 
         # Set initial height and width
         self.height = height
         self.width = width
+        self.grid = grid(height, width)
+
+        # Total number of mines on the board, if known
+        self.mine_count = mines
+
+        # Mine probabilities used when no safe move is known
+        self.guesser = MineProbabilities(max_component)
+
+        # Store sentence cells as bitmasks instead of sets
+        self.bitset = bitset
 
         # Keep track of which cells have been clicked on
         self.moves_made = set()
@@ -150,26 +507,86 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Cells that are neither chosen nor known mines, and known safe
+        # cells that have not been chosen yet
+        self.unknown = CellPool(height, width)
+        self.pending = CellPool(height, width, full=False)
+
+        # Sentences about the game known to be true
+        self.knowledge = KnowledgeBase()
+
+        # Number of cells and sentences inferred during the last move
+        self.inferences = {"mines": 0, "safes": 0, "subsets": 0}
+
+        # Cells deduced during the last move
+        self.deduced = {"mines": [], "safes": []}
+
+        # With profiling on, one record per add_knowledge call, and the
+        # time spent in each part of the last move
+        self.profile = profile
+        self.trace = []
+        self.timings = {"mark": 0.0, "subset": 0.0, "store": 0.0}
+
+    def clock(self):
+        """Returns the current time if profiling, or 0 otherwise."""
+        return time.perf_counter() if self.profile else 0.0
+
+    def write_trace(self, f, **fields):
+        """
+        Writes the profiling records to file object f as JSON lines,
+        adding `fields` (e.g. a game number) to every record.
+        """
+        for record in self.trace:
+            f.write(json.dumps({**fields, **record}) + "\n")
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
+        Returns the sentences that were updated.
         """
-        self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        sentences = self._mark_mine(cell)
+        for sentence in sentences:
+            self.knowledge.add(sentence, resolved=True)
+        return sentences
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
+        Returns the sentences that were updated.
+        """
+        sentences = self._mark_safe(cell)
+        for sentence in sentences:
+            self.knowledge.add(sentence, resolved=True)
+        return sentences
+
+    def _mark_mine(self, cell):
+        """
+        Like mark_mine, but the updated sentences are taken out of the
+        knowledge base, for infer to add back once it has looked at them.
+        """
+        self.mines.add(cell)
+        self.unknown.discard(cell)
+        sentences = self.knowledge.containing(cell)
+        for sentence in sentences:
+            self.knowledge.remove(sentence)
+            sentence.mark_mine(cell)
+        return sentences
+
+    def _mark_safe(self, cell):
+        """
+        Like mark_safe, but the updated sentences are taken out of the
+        knowledge base, for infer to add back once it has looked at them.
         """
+        if cell not in self.moves_made:
+            self.pending.add(cell)
         self.safes.add(cell)
-        for sentence in self.knowledge:
+        sentences = self.knowledge.containing(cell)
+        for sentence in sentences:
+            self.knowledge.remove(sentence)
             sentence.mark_safe(cell)
+        return sentences
 
     def add_knowledge(self, cell, count):
         """
@@ -187,53 +604,132 @@ class MinesweeperAI():
                if they can be inferred from existing knowledge
         """
 
+        start = self.clock()
+        self.timings = {"mark": 0.0, "subset": 0.0, "store": 0.0}
+        self.inferences = {"mines": 0, "safes": 0, "subsets": 0}
+        self.deduced = {"mines": [], "safes": []}
+
         # Update cell as safe
         self.moves_made.add(cell)
-        self.safes.add(cell)
-
-        # Get neighbors for the cell
-        neighbors = self.get_neighbors(cell)
-
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        self.unknown.discard(cell)
+        self.pending.discard(cell)
+        worklist = deque(self._mark_safe(cell))
 
-        sentence = Sentence(neighbors, count)
+        # Sentences resolved by calls to mark_mine or mark_safe
+        worklist.extend(self.knowledge.resolved())
 
-        # Clean up the sentence, making sure that none of the cells whose state
-        # has already been determined are contained in it
-        for neighbor in neighbors:
-            if neighbor in self.safes:
-                sentence.mark_safe(neighbor)
-            elif neighbor in self.mines:
-                sentence.mark_mine(neighbor)
-
-        self.knowledge.append(sentence)
-
-        # Check if any new cells can be marked as mines or safe, given the new knowledge
-        for sentence in self.knowledge:
-            self.mines.update(sentence.known_mines())
-            self.safes.update(sentence.known_safes())
-
-        self.knowledge.sort(key=lambda s: len(s.cells))
-
-        # Infer new rules
-        subsets = []
-        for i in range(0, len(self.knowledge)):
-            subset = False
-            for j in range(i + 1, len(self.knowledge)):
-                # If cells of current sentence are a subset of another sentences' cells,
-                # subtract the cells and the count
-                if self.knowledge[i].cells.issubset(self.knowledge[j].cells) and len(self.knowledge[i].cells) != 0:
-                    self.knowledge[j].cells -= self.knowledge[i].cells
-                    self.knowledge[j].count -= self.knowledge[i].count
-                    subset = True
-
-            # Keep track of subsets to remove them after all cell sets have been processed
-            if subset:
-                subsets.append(self.knowledge[i])
-
-        # Remove the subsets from the knowledge base
-        self.knowledge[:] = [item for item in self.knowledge if item not in subsets]
+        # Get neighbors for the cell, leaving out the ones already known
+        # so that the new sentence starts out clean
+        neighbors = self.get_neighbors(cell)
+        mines = neighbors & self.mines
+
+        sentence = self.new_sentence(neighbors - self.safes - mines,
+                                     count - len(mines))
+
+        worklist.append(sentence)
+        self.timings["mark"] += self.clock() - start
+
+        # Propagate until no sentence changes any more
+        self.infer(worklist)
+
+        if self.profile:
+            self.trace.append({
+                "move": len(self.moves_made),
+                "cell": list(cell),
+                "count": count,
+                "seconds": self.clock() - start,
+                **self.timings,
+                "subsets": self.inferences["subsets"],
+                "knowledge": len(self.knowledge),
+                "new_mines": [list(c) for c in self.deduced["mines"]],
+                "new_safes": [list(c) for c in self.deduced["safes"]],
+            })
+
+    def infer(self, worklist):
+        """
+        Draws conclusions from the sentences in worklist until a fixed
+        point is reached. Every sentence that changes on the way is added
+        back to the worklist, so unchanged sentences are never re-scanned.
+        Sentences in the worklist that are not in the knowledge base yet
+        are added to it, unless they are duplicates or fully resolved.
+
+        With profiling on, time is split between marking cells, subset
+        inference, and keeping the knowledge base's buckets and index
+        up to date, which takes the place of sorting the knowledge.
+        """
+        queued = {id(sentence) for sentence in worklist}
+        while worklist:
+            sentence = worklist.popleft()
+            queued.discard(id(sentence))
+            start = self.clock()
+
+            # Sentences outside the knowledge base miss any cells marked
+            # since they were taken out
+            if not self.knowledge.stores(sentence):
+                self.clean(sentence)
+            if not len(sentence):
+                continue
+
+            changed = []
+
+            # Mark any cells the sentence determines
+            mines = list(sentence.known_mines())
+            safes = list(sentence.known_safes())
+            for cell in mines:
+                self.inferences["mines"] += 1
+                self.deduced["mines"].append(cell)
+                changed.extend(self._mark_mine(cell))
+            for cell in safes:
+                self.inferences["safes"] += 1
+                self.deduced["safes"].append(cell)
+                changed.extend(self._mark_safe(cell))
+            marked = self.clock()
+            self.timings["mark"] += marked - start
+
+            stored = not (mines or safes) and (
+                self.knowledge.stores(sentence) or self.knowledge.add(sentence))
+            start = self.clock()
+            self.timings["store"] += start - marked
+
+            # If cells of one sentence are a subset of another sentence's
+            # cells, replace the larger one with the difference
+            if stored:
+                for other in self.knowledge.related(sentence):
+                    if sentence.issubset(other):
+                        subset, superset = sentence, other
+                    elif other.issubset(sentence):
+                        subset, superset = other, sentence
+                    else:
+                        continue
+                    self.inferences["subsets"] += 1
+                    self.knowledge.remove(superset)
+                    superset.subtract(subset)
+                    changed.append(superset)
+                    if superset is sentence:
+                        break
+            self.timings["subset"] += self.clock() - start
+
+            for other in changed:
+                if id(other) not in queued and len(other):
+                    queued.add(id(other))
+                    worklist.append(other)
+
+    def clean(self, sentence):
+        """
+        Cleans up a sentence, making sure that none of the cells whose state
+        has already been determined are contained in it.
+        """
+        for cell in list(sentence.cells):
+            if cell in self.safes:
+                sentence.mark_safe(cell)
+            elif cell in self.mines:
+                sentence.mark_mine(cell)
+
+    def new_sentence(self, cells, count):
+        """Returns a sentence in the representation chosen for this AI."""
+        if self.bitset:
+            return BitSentence(cells, count, self.width)
+        return Sentence(cells, count)
 
     def make_safe_move(self):
         """
@@ -245,48 +741,61 @@ class MinesweeperAI():
         and self.moves_made, but should not modify any of those values.
         """
 
-        possible_moves = list(self.safes - self.moves_made)
-
-        if possible_moves:
-            return random.choice(possible_moves)
+        if len(self.pending):
+            return self.pending.sample()
         else:
             return None
 
     def make_random_move(self):
         """
         Returns a move to make on the Minesweeper board.
-        Should choose randomly among cells that:
+        Should choose among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+        picking a cell with the lowest probability of being a mine,
+        at random if several are equally likely.
         """
 
-        all_moves = set((i, j) for i in range(0, self.height) for j in range(0, self.width))
-        possible_moves = list(all_moves - self.moves_made - self.mines)
-
-        if possible_moves:
-            return random.choice(possible_moves)
-        else:
+        if not len(self.unknown):
             return None
 
+        mines_left = None
+        if self.mine_count is not None:
+            mines_left = self.mine_count - len(self.mines)
+        unknown = len(self.unknown) - len(self.pending)
+        frontier, interior = self.guesser.probabilities(
+            self.knowledge, unknown, mines_left
+        )
+
+        # Prefer any cell outside the frontier if that is at least as safe
+        best = min(frontier.values(), default=1)
+        if unknown > len(frontier) and (
+                not frontier or interior is not None and interior <= best):
+            return self.sample_unconstrained(frontier)
+        return random.choice(
+            [cell for cell, p in frontier.items() if p <= best + 1e-12]
+        )
+
+    def sample_unconstrained(self, frontier, attempts=32):
+        """
+        Returns a random unknown cell that is neither in frontier nor
+        known to be safe, sampling from the pool of unknown cells.
+        """
+        for _ in range(attempts):
+            cell = self.unknown.sample()
+            if cell not in frontier and cell not in self.pending:
+                return cell
+
+        # Most unknown cells are constrained: pick among the others directly
+        return random.choice([
+            cell for cell in self.unknown
+            if cell not in frontier and cell not in self.pending
+        ])
+
     def get_neighbors(self, cell):
         """
-        Returns the number of mines that are
+        Returns the set of cells that are
         within one row and column of a given cell,
         not including the cell itself.
         """
-
-        neighbors = set()
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Add cell to neighbors
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    neighbors.add((i, j))
-
-        return neighbors
+        return self.grid.cell_neighbors(cell)
@@ -0,0 +1,267 @@
+import math
+import time
+
+
+class MineProbabilities:
+    """
+    Exact mine probabilities for the unknown cells of a Minesweeper board,
+    given the sentences in a MinesweeperAI's knowledge base.
+
+    Sentences that share cells form connected components, which are solved
+    independently by backtracking over their cells and combined using the
+    total number of mines left on the board. Solutions are cached per
+    component, so components a move did not touch are not solved again.
+    Only the components seen in the last call are kept.
+    """
+
+    def __init__(self, max_component=40):
+
+        # Components with more cells than this are only approximated
+        self.max_component = max_component
+
+        # Solutions by component, components seen in the current call,
+        # and timing of the last call
+        self.cache = dict()
+        self.used = set()
+        self.stats = dict()
+
+    def components(self, sentences):
+        """
+        Groups sentences into connected components of shared cells.
+        Returns a list of (cells, constraints) pairs, where constraints
+        is a list of (cells, count) pairs.
+        """
+        parent = dict()
+
+        def find(cell):
+            while parent[cell] != cell:
+                parent[cell] = parent[parent[cell]]
+                cell = parent[cell]
+            return cell
+
+        constraints = []
+        for sentence in sentences:
+            cells = tuple(sorted(sentence.cells))
+            if not cells:
+                continue
+            constraints.append((cells, sentence.count))
+            for cell in cells:
+                parent.setdefault(cell, cell)
+            root = find(cells[0])
+            for cell in cells[1:]:
+                other = find(cell)
+                if other != root:
+                    parent[other] = root
+
+        groups = dict()
+        for cells, count in constraints:
+            group = groups.setdefault(find(cells[0]), (set(), set()))
+            group[0].update(cells)
+            group[1].add((cells, count))
+        return [
+            (sorted(cells), sorted(constraints))
+            for cells, constraints in groups.values()
+        ]
+
+    def solve(self, cells, constraints):
+        """
+        Enumerates all mine assignments to cells that satisfy constraints.
+        Returns (solutions, mines), where solutions[k] is the number of
+        assignments with k mines, and mines[k][i] the number of those in
+        which cells[i] is a mine.
+        """
+        key = tuple(constraints)
+        self.used.add(key)
+        if key in self.cache:
+            self.stats["cached"] += 1
+            return self.cache[key]
+
+        # Visit cells constraint by constraint, so that constraints
+        # are completed, and checked, as early as possible
+        order = []
+        seen = set()
+        for constraint_cells, _ in constraints:
+            for cell in constraint_cells:
+                if cell not in seen:
+                    seen.add(cell)
+                    order.append(cell)
+        position = {cell: i for i, cell in enumerate(cells)}
+
+        touching = {cell: [] for cell in cells}
+        needed = []
+        unassigned = []
+        for c, (constraint_cells, count) in enumerate(constraints):
+            needed.append(count)
+            unassigned.append(len(constraint_cells))
+            for cell in constraint_cells:
+                touching[cell].append(c)
+
+        n = len(cells)
+        solutions = [0] * (n + 1)
+        mines = [[0] * n for _ in range(n + 1)]
+        assignment = []
+
+        def backtrack(k, total):
+            if k == len(order):
+                solutions[total] += 1
+                counts = mines[total]
+                for cell in assignment:
+                    counts[position[cell]] += 1
+                return
+            cell = order[k]
+            touched = touching[cell]
+
+            # Try the cell as a mine
+            if all(needed[c] > 0 for c in touched):
+                for c in touched:
+                    needed[c] -= 1
+                    unassigned[c] -= 1
+                assignment.append(cell)
+                backtrack(k + 1, total + 1)
+                assignment.pop()
+                for c in touched:
+                    needed[c] += 1
+                    unassigned[c] += 1
+
+            # Try the cell as safe
+            if all(needed[c] < unassigned[c] for c in touched):
+                for c in touched:
+                    unassigned[c] -= 1
+                backtrack(k + 1, total)
+                for c in touched:
+                    unassigned[c] += 1
+
+        backtrack(0, 0)
+        self.stats["enumerated"] += sum(solutions)
+        self.cache[key] = (solutions, mines)
+        return solutions, mines
+
+    def probabilities(self, sentences, unknown, mines_left=None):
+        """
+        Returns (frontier, interior): a dict of cell -> probability of a
+        mine for every cell mentioned in sentences, and the probability
+        for each of the other unknown cells (None if there are none).
+
+        `unknown` is the number of cells whose state is not known yet,
+        and `mines_left` the number of mines among them. Without
+        mines_left, components are not weighted against each other, and
+        interior cells get the average frontier probability.
+        """
+        start = time.perf_counter()
+        self.stats = {"components": 0, "largest": 0, "approximated": 0,
+                      "cached": 0, "enumerated": 0}
+        self.used = set()
+
+        frontier = dict()
+        exact = []
+        approximate_mines = 0
+        frontier_size = 0
+        for cells, constraints in self.components(sentences):
+            self.stats["components"] += 1
+            self.stats["largest"] = max(self.stats["largest"], len(cells))
+            frontier_size += len(cells)
+
+            # Too large to enumerate: use the densest sentence of each cell
+            if len(cells) > self.max_component:
+                self.stats["approximated"] += 1
+                for constraint_cells, count in constraints:
+                    p = count / len(constraint_cells)
+                    for cell in constraint_cells:
+                        frontier[cell] = max(frontier.get(cell, 0), p)
+                approximate_mines += sum(frontier[cell] for cell in cells)
+                continue
+
+            solutions, mines = self.solve(cells, constraints)
+
+            # Rescale counts, which only changes the overall normalization
+            largest = max(solutions)
+            exact.append((
+                cells,
+                [s / largest for s in solutions],
+                [[m / largest for m in row] for row in mines]
+            ))
+
+        # Components that changed since earlier calls won't come back
+        self.cache = {key: self.cache[key] for key in self.used}
+
+        interior = unknown - frontier_size
+        weights = self.weights(exact, interior, mines_left, approximate_mines)
+
+        # Combine each component with the distribution of all the others
+        prefix = [[1.0]]
+        for _, solutions, _ in exact:
+            prefix.append(convolve(prefix[-1], solutions))
+        suffix = [[1.0]]
+        for _, solutions, _ in reversed(exact):
+            suffix.append(convolve(suffix[-1], solutions))
+        suffix.reverse()
+
+        total = prefix[-1]
+        z = sum(t * weights(f) for f, t in enumerate(total))
+
+        # The mine count rules out every solution: fall back to unweighted
+        if not z:
+            mines_left = None
+            weights = self.weights(exact, interior, None, 0)
+            z = sum(total)
+        for i, (cells, solutions, mines) in enumerate(exact):
+            others = convolve(prefix[i], suffix[i + 1])
+            for k, row in enumerate(mines):
+                if not solutions[k]:
+                    continue
+                w = sum(o * weights(k + s) for s, o in enumerate(others))
+                for cell, m in zip(cells, row):
+                    frontier[cell] = frontier.get(cell, 0) + m * w / z
+
+        if interior <= 0:
+            p_interior = None
+        elif mines_left is None:
+            p_interior = (sum(frontier.values()) / len(frontier)
+                          if frontier else None)
+        else:
+            expected = sum(
+                t * weights(f) * (mines_left - approximate_mines - f)
+                for f, t in enumerate(total)
+            ) / z
+            p_interior = min(max(expected / interior, 0), 1)
+
+        self.stats["seconds"] = time.perf_counter() - start
+        return frontier, p_interior
+
+    def weights(self, exact, interior, mines_left, approximate_mines):
+        """
+        Returns a function of the number of mines f in the exactly solved
+        components, giving the relative number of ways to place the
+        remaining mines on interior cells, C(interior, left - f).
+        """
+        if mines_left is None:
+            return lambda f: 1.0
+
+        left = round(mines_left - approximate_mines)
+        interior = max(interior, 0)
+
+        def log_ways(f):
+            rest = left - f
+            if rest < 0 or rest > interior:
+                return None
+            return (math.lgamma(interior + 1) - math.lgamma(rest + 1)
+                    - math.lgamma(interior - rest + 1))
+
+        most = sum(len(cells) for cells, _, _ in exact)
+        logs = [log_ways(f) for f in range(most + 1)]
+        valid = [log for log in logs if log is not None]
+        if not valid:
+            return lambda f: 1.0
+        top = max(valid)
+        ways = [0.0 if log is None else math.exp(log - top) for log in logs]
+        return lambda f: ways[f] if f < len(ways) else 0.0
+
+
+def convolve(a, b):
+    """Returns the distribution of the sum of two mine counts."""
+    result = [0.0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                result[i + j] += x * y
+    return result
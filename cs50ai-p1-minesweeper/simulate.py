@@ -0,0 +1,208 @@
+import argparse
+import io
+import multiprocessing
+import random
+import time
+import tracemalloc
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+
+def play(height, width, mines, seed, bitset=False, memory=False,
+         flood=False, profile=False):
+    """
+    Plays one game of Minesweeper with the AI, without a display.
+    Returns a dict with the outcome, the number of moves, the total time,
+    the time taken by every move and by its add_knowledge call, the
+    knowledge size after every move, and, if memory is set, the peak
+    memory traced while playing.
+    With flood set, a move uncovers whole regions without nearby mines
+    at once, and the AI is told about every uncovered cell.
+    With profile set, the AI's per-move trace is returned as well, as
+    JSON lines tagged with the board, number of mines and seed.
+    """
+    if memory:
+        tracemalloc.start()
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, bitset=bitset,
+                       mines=mines, profile=profile)
+
+    revealed = set()
+    latencies = []
+    move_latencies = []
+    knowledge = []
+    won = False
+    start = time.perf_counter()
+    while True:
+        move_start = time.perf_counter()
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+            if move is None:
+                won = ai.mines == game.mines
+                break
+        if game.is_mine(move):
+            break
+
+        if flood:
+            uncovered = game.reveal(move)
+        else:
+            uncovered = [(move, game.nearby_mines(move))]
+        for cell, nearby in uncovered:
+            if cell in revealed:
+                continue
+            revealed.add(cell)
+            before = time.perf_counter()
+            ai.add_knowledge(cell, nearby)
+            latencies.append(time.perf_counter() - before)
+        move_latencies.append(time.perf_counter() - move_start)
+        knowledge.append(len(ai.knowledge))
+
+        if len(revealed) == height * width - mines:
+            won = True
+            break
+
+    seconds = time.perf_counter() - start
+    peak = 0
+    if memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "won": won,
+        "moves": len(revealed),
+        "seconds": seconds,
+        "latencies": latencies,
+        "move_latencies": move_latencies,
+        "knowledge": knowledge,
+        "peak": peak,
+        "trace": trace_lines(ai, height, width, mines, seed) if profile else "",
+    }
+
+
+def trace_lines(ai, height, width, mines, seed):
+    """Returns the AI's profiling records as JSON lines."""
+    f = io.StringIO()
+    ai.write_trace(f, board=f"{height}x{width}", mines=mines, seed=seed)
+    return f.getvalue()
+
+
+def play_task(task):
+    return task[:4], play(*task)
+
+
+def percentile(values, q):
+    """Returns the q-th percentile of a sorted list of values."""
+    if not values:
+        return 0
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def summarize(results, points=5):
+    """Aggregates the results of several games played on one board."""
+    latencies = sorted(
+        latency for r in results for latency in r["latencies"]
+    )
+    move_latencies = sorted(
+        latency for r in results for latency in r["move_latencies"]
+    )
+    moves = sum(r["moves"] for r in results)
+    seconds = sum(r["seconds"] for r in results)
+
+    # Average knowledge size at evenly spaced points through each game
+    over_time = []
+    for p in range(1, points + 1):
+        sizes = [
+            r["knowledge"][max(0, len(r["knowledge"]) * p // points - 1)]
+            for r in results if r["knowledge"]
+        ]
+        over_time.append(sum(sizes) / len(sizes) if sizes else 0)
+
+    return {
+        "games": len(results),
+        "win_rate": sum(r["won"] for r in results) / len(results),
+        "moves_per_second": moves / seconds if seconds else 0,
+        "p50": percentile(latencies, 50),
+        "p90": percentile(latencies, 90),
+        "p99": percentile(latencies, 99),
+        "max": latencies[-1] if latencies else 0,
+        "move_p50": percentile(move_latencies, 50),
+        "move_p99": percentile(move_latencies, 99),
+        "peak": max(r["peak"] for r in results),
+        "knowledge": over_time,
+        "max_knowledge": max(
+            (max(r["knowledge"]) for r in results if r["knowledge"]),
+            default=0
+        ),
+    }
+
+
+def board(text):
+    """Parses a board size written as HEIGHTxWIDTH."""
+    height, width = text.lower().split("x")
+    return int(height), int(width)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play Minesweeper games with the AI, without pygame.")
+    parser.add_argument("--games", type=int, default=100,
+                        help="games per board size and density")
+    parser.add_argument("--sizes", type=board, nargs="+", default=[(8, 8)],
+                        help="board sizes, e.g. 8x8 16x30")
+    parser.add_argument("--densities", type=float, nargs="+",
+                        default=[0.125], help="fraction of cells with mines")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="worker processes (default: number of CPUs)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bitset", action="store_true",
+                        help="use bitmask sentences (slightly slower than sets)")
+    parser.add_argument("--memory", action="store_true",
+                        help="trace peak memory (slows games down)")
+    parser.add_argument("--flood", action="store_true",
+                        help="uncover regions without nearby mines at once")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="write a JSON lines profile of every move")
+    args = parser.parse_args()
+
+    tasks = []
+    for height, width in args.sizes:
+        for density in args.densities:
+            mines = max(1, round(height * width * density))
+            for game in range(args.games):
+                tasks.append((height, width, mines, args.seed + game,
+                              args.bitset, args.memory, args.flood,
+                              args.trace is not None))
+
+    # Seeds are fixed per game, so results do not depend on scheduling
+    results = dict()
+    trace = open(args.trace, "w") if args.trace else None
+    with multiprocessing.Pool(args.processes) as pool:
+        for (height, width, mines, seed), result in pool.imap_unordered(
+                play_task, tasks):
+            if trace:
+                trace.write(result["trace"])
+            del result["trace"]
+            results.setdefault((height, width, mines), []).append(result)
+    if trace:
+        trace.close()
+
+    print(f"{'board':>9} {'mines':>6} {'games':>6} {'win %':>6} "
+          f"{'moves/s':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+          f"{'max ms':>8} {'move p50':>9} {'move p99':>9} {'peak MiB':>9}"
+          f"  knowledge over time (max)")
+    for (height, width, mines), games in sorted(results.items()):
+        s = summarize(games)
+        over_time = " ".join(f"{k:.0f}" for k in s["knowledge"])
+        print(f"{f'{height}x{width}':>9} {mines:>6} {s['games']:>6} "
+              f"{100 * s['win_rate']:>6.1f} {s['moves_per_second']:>9.0f} "
+              f"{1000 * s['p50']:>8.3f} {1000 * s['p90']:>8.3f} "
+              f"{1000 * s['p99']:>8.3f} {1000 * s['max']:>8.3f} "
+              f"{1000 * s['move_p50']:>9.3f} {1000 * s['move_p99']:>9.3f} "
+              f"{s['peak'] / 2 ** 20:>9.1f}  "
+              f"{over_time} ({s['max_knowledge']})")
+
+
+if __name__ == "__main__":
+    main()
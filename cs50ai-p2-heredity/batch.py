@@ -0,0 +1,147 @@
+import argparse
+import csv
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from heredity import METHODS, load_data
+
+FIELDS = ["family", "person", "gene_2", "gene_1", "gene_0",
+          "trait_true", "trait_false", "seconds", "error"]
+
+# Methods that run their chains on a process pool of their own, which pool
+# workers are not allowed to start, so each family runs them in one process
+POOLED = {"likelihood", "gibbs"}
+
+
+def family_files(patterns):
+    """
+    Returns the family CSV files given by `patterns`, each being a
+    directory, a glob pattern or a single file.
+    """
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.extend(sorted(glob.glob(os.path.join(pattern, "*.csv"))))
+        else:
+            files.extend(sorted(glob.glob(pattern)) or [pattern])
+    return files
+
+
+def process(task):
+    """
+    Runs inference on a single family file. Returns the file name, the
+    probabilities (None if it failed), the time taken and the error.
+    """
+    filename, method = task
+    options = {"processes": 1} if method in POOLED else {}
+    start = time.perf_counter()
+    try:
+        probabilities = METHODS[method](load_data(filename), **options)
+        error = None
+    except Exception as e:
+        probabilities = None
+        error = f"{type(e).__name__}: {e}"
+    return filename, probabilities, time.perf_counter() - start, error
+
+
+def csv_rows(filename, probabilities, seconds, error):
+    """
+    Returns the output rows of one family, one per person, or a single
+    row with the error if it failed.
+    """
+    if probabilities is None:
+        return [{"family": filename, "seconds": f"{seconds:.6f}", "error": error}]
+    return [
+        {
+            "family": filename,
+            "person": person,
+            "gene_2": distribution["gene"][2],
+            "gene_1": distribution["gene"][1],
+            "gene_0": distribution["gene"][0],
+            "trait_true": distribution["trait"][True],
+            "trait_false": distribution["trait"][False],
+            "seconds": f"{seconds:.6f}",
+        }
+        for person, distribution in probabilities.items()
+    ]
+
+
+def json_record(filename, probabilities, seconds, error):
+    """
+    Returns the output record of one family as a JSON string.
+    """
+    record = {"family": filename, "seconds": seconds}
+    if probabilities is None:
+        record["error"] = error
+    else:
+        record["probabilities"] = {
+            person: {
+                "gene": {str(n): p for n, p in distribution["gene"].items()},
+                "trait": {
+                    str(value).lower(): p
+                    for value, p in distribution["trait"].items()
+                },
+            }
+            for person, distribution in probabilities.items()
+        }
+    return json.dumps(record)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute gene and trait probabilities for many families.")
+    parser.add_argument("families", nargs="+",
+                        help="family CSV files, directories or glob patterns")
+    parser.add_argument("--method", choices=list(METHODS),
+                        default="elimination")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("--output", default="-",
+                        help="output file (default: standard output)")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="worker processes (default: number of CPUs)")
+    args = parser.parse_args()
+
+    files = family_files(args.families)
+    if not files:
+        sys.exit("No family files found")
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    if args.format == "csv":
+        writer = csv.DictWriter(output, fieldnames=FIELDS)
+        writer.writeheader()
+
+    # Results are written in the order families finish
+    start = time.perf_counter()
+    timings, failures = [], []
+    tasks = [(filename, args.method) for filename in files]
+    with multiprocessing.Pool(args.processes) as pool:
+        for filename, probabilities, seconds, error in pool.imap_unordered(
+                process, tasks):
+            if args.format == "csv":
+                writer.writerows(csv_rows(filename, probabilities, seconds, error))
+            else:
+                output.write(json_record(filename, probabilities, seconds, error) + "\n")
+            output.flush()
+
+            timings.append((seconds, filename))
+            if error is not None:
+                failures.append((filename, error))
+                print(f"{filename}: {error}", file=sys.stderr)
+
+    if output is not sys.stdout:
+        output.close()
+
+    total = time.perf_counter() - start
+    timings.sort()
+    print(f"{len(files)} families, {len(failures)} failed, "
+          f"{total:.2f}s total, {sum(s for s, f in timings) / len(timings):.4f}s "
+          f"mean, slowest {timings[-1][1]} ({timings[-1][0]:.4f}s)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
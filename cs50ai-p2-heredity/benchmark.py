@@ -0,0 +1,170 @@
+import argparse
+import csv
+import os
+import random
+import time
+
+from heredity import METHODS
+
+# Methods whose answers are exact and must agree with each other
+EXACT = ["enumeration", "genes", "vectorized", "elimination"]
+
+# How much longer each method takes per extra person, used to skip sizes
+# that would blow the time budget. Other methods are assumed to scale
+# linearly with the number of people.
+GROWTH = {"enumeration": 6, "genes": 3, "vectorized": 3}
+
+
+def random_pedigree(size, founders=0.3, observed=0.5, seed=None):
+    """
+    Generates a random multi-generation pedigree of `size` people in the
+    format returned by `load_data`. About a `founders` fraction of people
+    have no parents in the data: they marry into the family, while
+    everyone else is the child of an earlier couple. Each trait is known
+    with probability `observed`.
+    """
+    rng = random.Random(seed)
+    people = dict()
+    couples = []
+    single = []
+
+    def add(mother=None, father=None):
+        name = f"Person{len(people)}"
+        people[name] = {
+            "name": name,
+            "mother": mother,
+            "father": father,
+            "trait": (rng.random() < 0.5 if rng.random() < observed else None)
+        }
+        return name
+
+    # The family starts with a couple of founders
+    couples.append((add(), add()))
+    count = 2
+    while len(people) < size:
+        if single and count < founders * (len(people) + 1):
+            # Someone from outside the family marries a child
+            child = single.pop(rng.randrange(len(single)))
+            spouse = add()
+            couples.append((child, spouse) if rng.random() < 0.5 else (spouse, child))
+            count += 1
+        else:
+            # Prefer younger couples, so the family grows generations
+            couple = couples[int(len(couples) * rng.random() ** 0.5)]
+            single.append(add(*couple))
+    return people
+
+
+def save_pedigree(people, filename):
+    """
+    Writes a pedigree to a CSV file that `load_data` can read.
+    """
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "mother", "father", "trait"])
+        for person in people.values():
+            trait = person["trait"]
+            writer.writerow([
+                person["name"], person["mother"] or "", person["father"] or "",
+                "" if trait is None else int(trait)
+            ])
+
+
+def difference(a, b):
+    """
+    Returns the largest absolute difference between two results.
+    """
+    return max(
+        abs(a[person][field][value] - b[person][field][value])
+        for person in a
+        for field in a[person]
+        for value in a[person][field]
+    )
+
+
+def predict(method, seconds, size, new_size):
+    """
+    Returns the expected time of `method` on `new_size` people, given that
+    it took `seconds` on `size` people.
+    """
+    if method in GROWTH:
+        return seconds * GROWTH[method] ** min(new_size - size, 100)
+    return seconds * new_size / size
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time heredity inference methods on random pedigrees.")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[3, 5, 7, 9, 12, 20, 50, 100, 500])
+    parser.add_argument("--methods", nargs="+", choices=list(METHODS),
+                        default=EXACT)
+    parser.add_argument("--founders", type=float, default=0.3,
+                        help="fraction of people without parents")
+    parser.add_argument("--observed", type=float, default=0.5,
+                        help="fraction of people with a known trait")
+    parser.add_argument("--repeats", type=int, default=3,
+                        help="pedigrees per size")
+    parser.add_argument("--budget", type=float, default=10,
+                        help="skip sizes on which a method is expected to "
+                             "take longer than this many seconds")
+    parser.add_argument("--tolerance", type=float, default=1e-9,
+                        help="largest difference allowed between exact methods")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--write", metavar="DIR",
+                        help="also save the generated pedigrees as CSV files")
+    args = parser.parse_args()
+
+    if args.write:
+        os.makedirs(args.write, exist_ok=True)
+
+    # Run every method once, so imports aren't part of the first timing
+    for method in args.methods:
+        METHODS[method](random_pedigree(3, seed=args.seed))
+
+    print(f"{'size':>6} {'method':>12} {'seconds':>10} {'max diff':>10}  agree")
+    # Mean time and size of the last run of each method
+    last = dict()
+    for size in args.sizes:
+        skip = {
+            method for method, (seconds, previous) in last.items()
+            if predict(method, seconds, previous, size) > args.budget
+        }
+        times = {method: [] for method in args.methods}
+        diffs = {method: 0 for method in args.methods}
+        for repeat in range(args.repeats):
+            seed = args.seed + 1000 * size + repeat
+            people = random_pedigree(size, args.founders, args.observed, seed)
+            if args.write:
+                save_pedigree(people, os.path.join(
+                    args.write, f"pedigree{size}_{repeat}.csv"))
+
+            # The first exact method that runs is the reference answer
+            reference = None
+            for method in args.methods:
+                if method in skip:
+                    continue
+                start = time.perf_counter()
+                probabilities = METHODS[method](people)
+                times[method].append(time.perf_counter() - start)
+                if reference is None and method in EXACT:
+                    reference = probabilities
+                elif reference is not None:
+                    diffs[method] = max(
+                        diffs[method], difference(reference, probabilities)
+                    )
+
+        for method in args.methods:
+            if not times[method]:
+                continue
+            seconds = sum(times[method]) / len(times[method])
+            agree = "yes" if diffs[method] <= args.tolerance else (
+                "no" if method in EXACT else "approx"
+            )
+            print(f"{size:>6} {method:>12} {seconds:>10.4f} "
+                  f"{diffs[method]:>10.2e}  {agree}")
+            last[method] = (seconds, size)
+
+
+if __name__ == "__main__":
+    main()
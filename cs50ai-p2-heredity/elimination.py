@@ -0,0 +1,370 @@
+import itertools
+import time
+
+from heredity import PROBS, empty_probabilities, inheritance_probability, normalize
+
+# Possible number of gene copies, also used as index into factor tables
+GENES = (0, 1, 2)
+
+
+class Factor():
+    """
+    Table of non-negative values over the gene counts of some people.
+    `values` is a flat list with one entry per assignment, the first
+    variable being the most significant digit (base 3).
+    """
+
+    def __init__(self, variables, values):
+        self.variables = tuple(variables)
+        self.values = values
+
+    def __repr__(self):
+        return f"Factor({self.variables}, {self.values})"
+
+
+def index(assignment, positions):
+    """
+    Returns the position in a factor table of the values in `assignment`
+    at the given `positions`.
+    """
+    i = 0
+    for position in positions:
+        i = 3 * i + assignment[position]
+    return i
+
+
+def combine(factors, variables, keep):
+    """
+    Multiplies `factors` together over `variables` and sums out every
+    variable not in `keep`. The result is scaled to sum to 1, which
+    keeps long pedigrees from underflowing.
+    """
+    keep = tuple(keep)
+    positions = [
+        [variables.index(v) for v in factor.variables]
+        for factor in factors
+    ]
+    kept = [variables.index(v) for v in keep]
+
+    values = [0.0] * (3 ** len(keep))
+    for assignment in itertools.product(GENES, repeat=len(variables)):
+        p = 1.0
+        for factor, position in zip(factors, positions):
+            p *= factor.values[index(assignment, position)]
+            if not p:
+                break
+        if p:
+            values[index(assignment, kept)] += p
+
+    total = sum(values)
+    if total:
+        values = [v / total for v in values]
+    return Factor(keep, values)
+
+
+def person_factor(people, person):
+    """
+    Returns the factor of a single person: the probability of their gene
+    count given their parents, times the likelihood of their known trait.
+    """
+    mother = people[person]["mother"]
+    father = people[person]["father"]
+    trait = people[person]["trait"]
+
+    if mother is None and father is None:
+        variables = (person,)
+        values = [PROBS["gene"][genes] for genes in GENES]
+    else:
+        variables = (person, mother, father)
+        values = [
+            inheritance_probability(genes, mother_genes, father_genes)
+            for genes, mother_genes, father_genes
+            in itertools.product(GENES, repeat=3)
+        ]
+
+    if trait is not None:
+        for i in range(len(values)):
+            # The person's own gene count is the most significant digit
+            genes = i // 3 ** (len(variables) - 1)
+            values[i] *= PROBS["trait"][genes][trait]
+
+    return Factor(variables, values)
+
+
+def moral_graph(people):
+    """
+    Returns the undirected graph linking each person to their parents,
+    and both parents to each other.
+    """
+    graph = {person: set() for person in people}
+    for person in people:
+        parents = [people[person]["mother"], people[person]["father"]]
+        parents = [parent for parent in parents if parent is not None]
+        for parent in parents:
+            graph[person].add(parent)
+            graph[parent].add(person)
+        if len(parents) == 2:
+            mother, father = parents
+            graph[mother].add(father)
+            graph[father].add(mother)
+    return graph
+
+
+def fill_in(graph, variable):
+    """
+    Returns the number of edges that eliminating `variable` would add.
+    """
+    neighbors = list(graph[variable])
+    return sum(
+        1 for a, b in itertools.combinations(neighbors, 2)
+        if b not in graph[a]
+    )
+
+
+def elimination_order(people):
+    """
+    Returns an elimination order for the people in the pedigree, greedily
+    picking the person with the fewest fill-in edges (ties broken by
+    fewest neighbors), and the graph after all fill-in edges were added.
+    """
+    graph = moral_graph(people)
+    remaining = {person: set(neighbors) for person, neighbors in graph.items()}
+    scores = {
+        person: (fill_in(remaining, person), len(remaining[person]))
+        for person in remaining
+    }
+
+    order = []
+    while scores:
+        variable = min(scores, key=scores.get)
+        order.append(variable)
+        neighbors = remaining.pop(variable)
+        del scores[variable]
+
+        # Connect all neighbors and remove the variable from the graph
+        for a, b in itertools.combinations(neighbors, 2):
+            if b not in remaining[a]:
+                remaining[a].add(b)
+                remaining[b].add(a)
+                graph[a].add(b)
+                graph[b].add(a)
+        for neighbor in neighbors:
+            remaining[neighbor].discard(variable)
+
+        # Only scores close to the eliminated variable can have changed
+        affected = set(neighbors)
+        for neighbor in neighbors:
+            affected |= remaining[neighbor]
+        for person in affected:
+            scores[person] = (fill_in(remaining, person), len(remaining[person]))
+
+    return order, graph
+
+
+class CliqueTree():
+    """
+    Clique tree of a pedigree, built from an elimination order. Eliminating
+    a person creates the clique of that person and their remaining
+    neighbors, whose parent is the clique of the neighbor eliminated next.
+    Messages are computed as in Shafer-Shenoy and cached, so every marginal
+    comes from the same two passes over the tree.
+    """
+
+    def __init__(self, people):
+        self.people = people
+        self.order, graph = elimination_order(people)
+        position = {person: i for i, person in enumerate(self.order)}
+
+        # Clique and parent clique of each person
+        self.cliques = {}
+        self.parent = {}
+        self.children = {person: [] for person in people}
+        for person in self.order:
+            later = sorted(
+                (n for n in graph[person] if position[n] > position[person]),
+                key=position.get
+            )
+            self.cliques[person] = (person, *later)
+            self.parent[person] = later[0] if later else None
+            if later:
+                self.children[later[0]].append(person)
+
+        # Each person's factor belongs to the clique of the first eliminated
+        # variable in it
+        self.home = {}
+        self.factors = {person: {} for person in people}
+        for person in people:
+            factor = person_factor(people, person)
+            self.home[person] = min(factor.variables, key=position.get)
+            self.factors[self.home[person]][person] = factor
+
+        self.messages = {}
+
+    def neighbors(self, clique):
+        """
+        Returns the cliques adjacent to `clique` in the tree.
+        """
+        parent = self.parent[clique]
+        return self.children[clique] + ([parent] if parent is not None else [])
+
+    def separator(self, source, target):
+        """
+        Returns the variables shared by two adjacent cliques.
+        """
+        child = source if self.parent[source] == target else target
+        return self.cliques[child][1:]
+
+    def message(self, source, target):
+        """
+        Returns the message from clique `source` to clique `target`,
+        computing it from the incoming messages if it isn't cached.
+        """
+        key = (source, target)
+        if key not in self.messages:
+            factors = list(self.factors[source].values()) + [
+                self.messages[(neighbor, source)]
+                for neighbor in self.neighbors(source)
+                if neighbor != target
+            ]
+            self.messages[key] = combine(
+                factors, self.cliques[source], self.separator(source, target)
+            )
+        return self.messages[key]
+
+    def calibrate(self):
+        """
+        Computes all missing messages: first towards the roots, in
+        elimination order, then back towards the leaves.
+        """
+        for person in self.order:
+            if self.parent[person] is not None:
+                self.message(person, self.parent[person])
+        for person in reversed(self.order):
+            for child in self.children[person]:
+                self.message(person, child)
+
+    def collect(self, target):
+        """
+        Computes the missing messages towards clique `target` only, leaves
+        first, which is all that the marginal of its person needs. A cached
+        message never depends on a missing one, so the search stops there.
+        """
+        visited = [target]
+        towards = {target: None}
+        for clique in visited:
+            for neighbor in self.neighbors(clique):
+                if (neighbor != towards[clique]
+                        and (neighbor, clique) not in self.messages):
+                    towards[neighbor] = clique
+                    visited.append(neighbor)
+        for clique in reversed(visited[1:]):
+            self.message(clique, towards[clique])
+
+    def invalidate(self, clique):
+        """
+        Drops the cached messages that depend on the factors of `clique`,
+        which are all messages directed away from it.
+        """
+        frontier = [(clique, neighbor) for neighbor in self.neighbors(clique)]
+        while frontier:
+            source, target = frontier.pop()
+            if self.messages.pop((source, target), None) is None:
+                # Messages further away were never computed from this one
+                continue
+            frontier.extend(
+                (target, neighbor) for neighbor in self.neighbors(target)
+                if neighbor != source
+            )
+
+    def marginal(self, person):
+        """
+        Returns the normalized distribution over the gene count of `person`.
+        """
+        self.collect(person)
+        factors = list(self.factors[person].values()) + [
+            self.message(neighbor, person)
+            for neighbor in self.neighbors(person)
+        ]
+        return combine(factors, self.cliques[person], (person,)).values
+
+    def distribution(self, person):
+        """
+        Returns the gene and trait distributions of `person`, in the same
+        format as the enumeration in heredity.py.
+        """
+        genes = self.marginal(person)
+        trait = self.people[person]["trait"]
+        distribution = empty_probabilities([person])
+        for n in GENES:
+            distribution[person]["gene"][n] = genes[n]
+            if trait is None:
+                for value in (True, False):
+                    distribution[person]["trait"][value] += (
+                        genes[n] * PROBS["trait"][n][value]
+                    )
+        if trait is not None:
+            distribution[person]["trait"][trait] = 1
+
+        normalize(distribution)
+        return distribution[person]
+
+    def probabilities(self):
+        """
+        Returns gene and trait distributions for every person, in the
+        same format as the enumeration in heredity.py.
+        """
+        self.calibrate()
+        return {person: self.distribution(person) for person in self.people}
+
+
+class InferenceSession(CliqueTree):
+    """
+    Clique tree that stays around while traits are observed one at a time.
+    Changing a trait only replaces that person's factor and drops the
+    messages depending on it; everything else is reused from the cache.
+    """
+
+    def __init__(self, people):
+        # Copy, so that observations don't change the caller's data
+        super().__init__({
+            person: dict(info) for person, info in people.items()
+        })
+        self.latency = None
+        self.recomputed = 0
+
+    def message(self, source, target):
+        if (source, target) not in self.messages:
+            self.recomputed += 1
+        return super().message(source, target)
+
+    def observe(self, person, trait, query=None):
+        """
+        Sets the trait of `person` to True, False or None (unknown) and
+        returns the new distributions of the people in `query`, or of
+        everyone if it is None, in the same format as `probabilities`.
+        Dropped messages are only recomputed when a queried marginal
+        needs them. The number of recomputed messages is in `recomputed`,
+        and the time taken, marginals included, in `latency`.
+        """
+        start = time.perf_counter()
+        self.recomputed = 0
+
+        self.people[person]["trait"] = trait
+        home = self.home[person]
+        self.factors[home][person] = person_factor(self.people, person)
+        self.invalidate(home)
+        if query is None:
+            distributions = self.probabilities()
+        else:
+            distributions = {other: self.distribution(other) for other in query}
+
+        self.latency = time.perf_counter() - start
+        return distributions
+
+
+def infer(people):
+    """
+    Computes gene and trait probabilities for each person in `people`
+    by variable elimination.
+    """
+    return CliqueTree(people).probabilities()
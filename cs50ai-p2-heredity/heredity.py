@@ -1,7 +1,7 @@
 import csv
 import itertools
+import math
 import sys
-from functools import reduce
 
 PROBS = {
 
@@ -40,26 +40,57 @@ PROBS = {
 
 def main():
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python heredity.py data.csv [method]")
     people = load_data(sys.argv[1])
+    method = sys.argv[2] if len(sys.argv) == 3 else "enumeration"
+    if method not in METHODS:
+        sys.exit(f"Unknown method {method}, choose from: "
+                 + ", ".join(METHODS))
 
-    # Keep track of gene and trait probabilities for each person
-    probabilities = {
+    # Compute gene and trait probabilities for each person
+    probabilities = METHODS[method](people)
+
+    # Print results
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                print(f"    {value}: {p:.4f}")
+
+
+def empty_probabilities(people, value=0):
+    """
+    Returns a dictionary with a gene and trait distribution for each
+    person, with every entry set to `value`.
+    """
+    return {
         person: {
             "gene": {
-                2: 0,
-                1: 0,
-                0: 0
+                2: value,
+                1: value,
+                0: value
             },
             "trait": {
-                True: 0,
-                False: 0
+                True: value,
+                False: value
             }
         }
         for person in people
     }
 
+
+def enumeration(people):
+    """
+    Computes gene and trait probabilities for each person by enumerating
+    every combination of genes and traits.
+    """
+
+    # Keep track of gene and trait log probabilities for each person
+    log_probabilities = empty_probabilities(people, -math.inf)
+
     # Loop over all sets of people who might have the trait
     names = set(people)
     for have_trait in powerset(names):
@@ -77,20 +108,86 @@ def main():
         for one_gene in powerset(names):
             for two_genes in powerset(names - one_gene):
                 # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+                log_p = log_joint_probability(
+                    people, one_gene, two_genes, have_trait
+                )
+                log_update(log_probabilities, one_gene, two_genes,
+                           have_trait, log_p)
 
     # Ensure probabilities sum to 1
-    normalize(probabilities)
+    return log_normalize(log_probabilities)
 
-    # Print results
-    for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+
+def gene_enumeration(people):
+    """
+    Computes gene and trait probabilities for each person by enumerating
+    only combinations of genes. A person's trait depends on nothing but
+    their own genes, so known traits are multiplied in as evidence and
+    unknown traits are summed out for every gene combination.
+    """
+    log_probabilities = empty_probabilities(people, -math.inf)
+
+    names = set(people)
+    for one_gene in powerset(names):
+        for two_genes in powerset(names - one_gene):
+            log_p = log_gene_probability(people, one_gene, two_genes)
+            for person in names:
+                genes = (
+                    1 if person in one_gene else
+                    2 if person in two_genes else
+                    0
+                )
+                entry = log_probabilities[person]
+                entry["gene"][genes] = log_add(entry["gene"][genes], log_p)
+
+                trait = people[person]["trait"]
+                if trait is not None:
+                    entry["trait"][trait] = log_add(entry["trait"][trait], log_p)
+                else:
+                    for value in (True, False):
+                        entry["trait"][value] = log_add(
+                            entry["trait"][value],
+                            log_p + log(PROBS["trait"][genes][value])
+                        )
+
+    return log_normalize(log_probabilities)
+
+
+def variable_elimination(people):
+    """
+    Computes gene and trait probabilities for each person by variable
+    elimination over the pedigree, see elimination.py.
+    """
+    # Imported here, as elimination.py itself depends on this module
+    import elimination
+    return elimination.infer(people)
+
+
+def vectorized(people):
+    """
+    Computes gene and trait probabilities for each person by evaluating
+    all gene combinations at once with NumPy, see vectorized.py.
+    """
+    import vectorized
+    return vectorized.infer(people)
+
+
+def likelihood_weighting(people, processes=None):
+    """
+    Estimates gene and trait probabilities for each person by likelihood
+    weighting, see sampling.py for error estimates and more options.
+    """
+    import sampling
+    return sampling.likelihood_weighting(people, processes=processes)[0]
+
+
+def gibbs(people, processes=None):
+    """
+    Estimates gene and trait probabilities for each person by Gibbs
+    sampling, see sampling.py for error estimates and more options.
+    """
+    import sampling
+    return sampling.gibbs(people, processes=processes)[0]
 
 
 def load_data(filename):
@@ -138,11 +235,22 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         * everyone in set `have_trait` has the trait, and
         * everyone not in set` have_trait` does not have the trait.
     """
+    return math.exp(
+        log_joint_probability(people, one_gene, two_genes, have_trait)
+    )
+
+
+def log_joint_probability(people, one_gene, two_genes, have_trait):
+    """
+    Compute and return the natural logarithm of the joint probability
+    described in `joint_probability`. Summing logs instead of multiplying
+    probabilities keeps large families from underflowing to 0.
+    """
 
     all_people = set(people.keys())
     people_info = map_arguments(all_people, one_gene, two_genes, have_trait)
 
-    probabilities = {}
+    log_p = 0
 
     for person in all_people:
         n_genes = people_info[person]['genes']
@@ -154,27 +262,64 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         if father == mother is None:
             p_genes = PROBS["gene"][n_genes]
         else:
-            p_inherit_father = abs(0.5 * people_info[father]['genes'] - PROBS["mutation"])
-            p_inherit_mother = abs(0.5 * people_info[mother]['genes'] - PROBS["mutation"])
-
-            if n_genes == 0:
-                # Person has no genes, meaning he/she doesn't get the from the father or the mother
-                p_genes = (1 - p_inherit_father) * (1 - p_inherit_mother)
-            elif n_genes == 1:
-                # Person only has one gene, meaning he/she gets it either from his/her mother or father
-                p_genes = p_inherit_father * (1 - p_inherit_mother) + (1 - p_inherit_father) * p_inherit_mother
-            else:
-                # Person has two genes, meaning he/she gets one from father and mother
-                p_genes = p_inherit_father * p_inherit_mother
+            p_genes = inheritance_probability(
+                n_genes,
+                people_info[mother]['genes'],
+                people_info[father]['genes']
+            )
 
         # Check the probability, that a person has or doesn't have the trait
-        p_trait = p_genes * PROBS["trait"][n_genes][people_info[person]['trait']]
-        probabilities[person] = {'p_genes': p_genes, 'p_trait': p_trait}
+        p_trait = PROBS["trait"][n_genes][people_info[person]['trait']]
+        log_p += log(p_genes) + log(p_trait)
+
+    return log_p
+
+
+def log_gene_probability(people, one_gene, two_genes):
+    """
+    Compute and return the log probability that everyone in `one_gene` has
+    one copy of the gene, everyone in `two_genes` has two copies, everyone
+    else has none, and that everyone with a known trait has that trait.
+    """
+    genes = {
+        person: (1 if person in one_gene else 2 if person in two_genes else 0)
+        for person in people
+    }
+
+    log_p = 0
+    for person, n_genes in genes.items():
+        father = people[person]['father']
+        mother = people[person]['mother']
+        if father == mother is None:
+            log_p += log(PROBS["gene"][n_genes])
+        else:
+            log_p += log(inheritance_probability(
+                n_genes, genes[mother], genes[father]
+            ))
+
+        trait = people[person]['trait']
+        if trait is not None:
+            log_p += log(PROBS["trait"][n_genes][trait])
+    return log_p
 
-    values = probabilities.values()
-    p_traits = [entry['p_trait'] for entry in values]
 
-    return reduce(lambda x, y: x * y, p_traits)
+def inheritance_probability(n_genes, mother_genes, father_genes):
+    """
+    Returns the probability that a child has `n_genes` copies of the gene,
+    given the number of copies its mother and father have.
+    """
+    p_inherit_father = abs(0.5 * father_genes - PROBS["mutation"])
+    p_inherit_mother = abs(0.5 * mother_genes - PROBS["mutation"])
+
+    if n_genes == 0:
+        # Person has no genes, meaning he/she doesn't get the from the father or the mother
+        return (1 - p_inherit_father) * (1 - p_inherit_mother)
+    elif n_genes == 1:
+        # Person only has one gene, meaning he/she gets it either from his/her mother or father
+        return p_inherit_father * (1 - p_inherit_mother) + (1 - p_inherit_father) * p_inherit_mother
+    else:
+        # Person has two genes, meaning he/she gets one from father and mother
+        return p_inherit_father * p_inherit_mother
 
 
 def update(probabilities, one_gene, two_genes, have_trait, p):
@@ -193,6 +338,23 @@ def update(probabilities, one_gene, two_genes, have_trait, p):
         probabilities[person]['trait'][people_data[person]['trait']] += p
 
 
+def log_update(log_probabilities, one_gene, two_genes, have_trait, log_p):
+    """
+    Like `update`, but adds the probability with log `log_p` to
+    distributions that hold log probabilities.
+    """
+
+    all_people = log_probabilities.keys()
+    people_data = map_arguments(all_people, one_gene, two_genes, have_trait)
+
+    for person in all_people:
+        genes = people_data[person]['genes']
+        trait = people_data[person]['trait']
+        entry = log_probabilities[person]
+        entry['gene'][genes] = log_add(entry['gene'][genes], log_p)
+        entry['trait'][trait] = log_add(entry['trait'][trait], log_p)
+
+
 def normalize(probabilities):
     """
     Update `probabilities` such that each probability distribution
@@ -205,10 +367,57 @@ def normalize(probabilities):
             values = [item[1] for item in items]
             s = sum(values)
 
+            # A distribution without any mass can't be normalized
+            if s == 0:
+                continue
+
             for k, v in items:
                 probabilities[person][key][k] = v / s
 
 
+def log_normalize(log_probabilities):
+    """
+    Returns normalized probabilities from distributions that hold log
+    probabilities, using log-sum-exp so that no distribution underflows.
+    """
+    probabilities = empty_probabilities(log_probabilities)
+    for person in log_probabilities:
+        for key in log_probabilities[person]:
+            items = log_probabilities[person][key].items()
+            total = log_sum([v for k, v in items])
+            for k, v in items:
+                probabilities[person][key][k] = math.exp(v - total)
+    return probabilities
+
+
+def log(p):
+    """
+    Returns the natural logarithm of `p`, -inf for a probability of 0.
+    """
+    return math.log(p) if p > 0 else -math.inf
+
+
+def log_add(a, b):
+    """
+    Returns log(exp(a) + exp(b)) without leaving log space.
+    """
+    if a < b:
+        a, b = b, a
+    if b == -math.inf:
+        return a
+    return a + math.log1p(math.exp(b - a))
+
+
+def log_sum(values):
+    """
+    Returns log(sum(exp(v) for v in values)), shifting by the largest value.
+    """
+    largest = max(values)
+    if largest == -math.inf:
+        return largest
+    return largest + math.log(sum(math.exp(v - largest) for v in values))
+
+
 def map_arguments(all_people, one_gene, two_genes, have_trait):
     """
     Takes all people and the group they are in and returns a mapping of
@@ -227,5 +436,16 @@ def map_arguments(all_people, one_gene, two_genes, have_trait):
     return people_data
 
 
+# Inference methods that can be chosen on the command line
+METHODS = {
+    "enumeration": enumeration,
+    "genes": gene_enumeration,
+    "elimination": variable_elimination,
+    "vectorized": vectorized,
+    "likelihood": likelihood_weighting,
+    "gibbs": gibbs,
+}
+
+
 if __name__ == "__main__":
     main()
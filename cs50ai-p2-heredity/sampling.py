@@ -0,0 +1,375 @@
+import argparse
+import math
+import multiprocessing
+import random
+
+from heredity import PROBS, empty_probabilities, inheritance_probability, load_data
+
+# Every value that is estimated for a person, in the order of `probabilities`
+OUTCOMES = [("gene", 2), ("gene", 1), ("gene", 0), ("trait", True), ("trait", False)]
+
+
+class Pedigree():
+    """
+    Precomputed structure of a pedigree for sampling: people ordered so
+    parents come before their children, each person's children, and
+    the likelihood of their known trait for every gene count.
+    """
+
+    def __init__(self, people):
+        self.people = people
+
+        # Order people so that parents are sampled before their children
+        self.order = []
+        placed = set()
+        for person in people:
+            stack = [person]
+            while stack:
+                current = stack[-1]
+                if current in placed:
+                    stack.pop()
+                    continue
+                parents = [
+                    parent for parent in
+                    (people[current]["mother"], people[current]["father"])
+                    if parent is not None and parent not in placed
+                ]
+                if parents:
+                    stack.extend(parents)
+                else:
+                    stack.pop()
+                    placed.add(current)
+                    self.order.append(current)
+
+        self.children = {person: [] for person in people}
+        for person in people:
+            for parent in (people[person]["mother"], people[person]["father"]):
+                if parent is not None:
+                    self.children[parent].append(person)
+
+        self.likelihood = {
+            person: [
+                1 if people[person]["trait"] is None
+                else PROBS["trait"][genes][people[person]["trait"]]
+                for genes in range(3)
+            ]
+            for person in people
+        }
+
+    def gene_probability(self, person, genes, assignment):
+        """
+        Returns the probability of `person` having `genes` copies of the
+        gene, given the genes of their parents in `assignment`.
+        """
+        mother = self.people[person]["mother"]
+        father = self.people[person]["father"]
+        if mother is None and father is None:
+            return PROBS["gene"][genes]
+        return inheritance_probability(genes, assignment[mother], assignment[father])
+
+    def outcomes(self, person, distribution):
+        """
+        Returns the value of every outcome of `person`, given a distribution
+        over their gene count. Unknown traits are summed out instead of
+        sampled, which lowers the variance of the estimates.
+        """
+        trait = self.people[person]["trait"]
+        values = [distribution[2], distribution[1], distribution[0]]
+        for value in (True, False):
+            if trait is None:
+                values.append(sum(
+                    distribution[genes] * PROBS["trait"][genes][value]
+                    for genes in range(3)
+                ))
+            else:
+                values.append(1 if trait == value else 0)
+        return values
+
+    def conditional(self, person, assignment):
+        """
+        Returns the distribution over the gene count of `person`, given the
+        genes of everyone else in `assignment` and the known traits.
+        """
+        weights = []
+        for genes in range(3):
+            assignment[person] = genes
+            w = self.gene_probability(person, genes, assignment)
+            w *= self.likelihood[person][genes]
+            for child in self.children[person]:
+                w *= self.gene_probability(child, assignment[child], assignment)
+            weights.append(w)
+        total = sum(weights)
+        return [w / total for w in weights]
+
+
+def sample_genes(distribution, rng):
+    """
+    Returns a gene count drawn from `distribution`.
+    """
+    r = rng.random()
+    for genes in range(2):
+        r -= distribution[genes]
+        if r < 0:
+            return genes
+    return 2
+
+
+def weighting_chain(task):
+    """
+    Runs likelihood weighting for `samples` samples with its own seed.
+    Returns the sums needed to combine chains and estimate errors:
+    sum of weights, of squared weights, and per person and outcome the
+    sums of w * x, w^2 * x and w^2 * x^2. Weights are kept relative to
+    the largest log weight seen, which is returned first, so that large
+    pedigrees with many known traits do not underflow.
+    """
+    people, samples, seed = task
+    pedigree = Pedigree(people)
+    rng = random.Random(seed)
+
+    shift = -math.inf
+    total, squares = 0, 0
+    sums = {person: [[0, 0, 0] for _ in OUTCOMES] for person in people}
+    for _ in range(samples):
+        # Sample genes forward, weighting by the likelihood of known traits
+        assignment = {}
+        log_w = 0
+        for person in pedigree.order:
+            distribution = [
+                pedigree.gene_probability(person, genes, assignment)
+                for genes in range(3)
+            ]
+            assignment[person] = sample_genes(distribution, rng)
+            log_w += math.log(pedigree.likelihood[person][assignment[person]])
+
+        # Rescale the sums when a sample outweighs all earlier ones
+        if log_w > shift:
+            scale = math.exp(shift - log_w) if shift > -math.inf else 0
+            total *= scale
+            squares *= scale * scale
+            for outcomes in sums.values():
+                for values in outcomes:
+                    values[0] *= scale
+                    values[1] *= scale * scale
+                    values[2] *= scale * scale
+            shift = log_w
+        w = math.exp(log_w - shift)
+
+        total += w
+        squares += w * w
+        for person in people:
+            indicator = [0, 0, 0]
+            indicator[assignment[person]] = 1
+            for i, x in enumerate(pedigree.outcomes(person, indicator)):
+                sums[person][i][0] += w * x
+                sums[person][i][1] += w * w * x
+                sums[person][i][2] += w * w * x * x
+    return shift, total, squares, sums
+
+
+def likelihood_weighting(people, samples=10000, seed=None, chains=1,
+                         processes=None):
+    """
+    Estimates gene and trait probabilities by likelihood weighting, split
+    over `chains` independent runs, on a process pool if `processes` is
+    not 1. Returns the probabilities, their standard errors in the same
+    structure, and diagnostics with the effective sample size.
+    """
+    rng = random.Random(seed)
+    tasks = [
+        (people, samples // chains + (i < samples % chains), rng.randrange(2 ** 32))
+        for i in range(chains)
+    ]
+    results = run(weighting_chain, tasks, processes)
+
+    # Bring the sums of all chains to the same scale
+    shift = max(result[0] for result in results)
+    scales = [math.exp(result[0] - shift) for result in results]
+    total = sum(scale * result[1] for scale, result in zip(scales, results))
+    squares = sum(
+        scale * scale * result[2] for scale, result in zip(scales, results)
+    )
+    probabilities = empty_probabilities(people)
+    errors = empty_probabilities(people)
+    for person in people:
+        for i, (field, value) in enumerate(OUTCOMES):
+            wx, w2x, w2x2 = (
+                sum(
+                    scale ** (1 if j == 0 else 2) * result[3][person][i][j]
+                    for scale, result in zip(scales, results)
+                )
+                for j in range(3)
+            )
+            mean = wx / total
+
+            # Delta method error of a self-normalized importance estimate
+            variance = (w2x2 - 2 * mean * w2x + mean * mean * squares) / total ** 2
+            probabilities[person][field][value] = mean
+            errors[person][field][value] = math.sqrt(max(variance, 0))
+
+    diagnostics = {"ess": total * total / squares}
+    return probabilities, errors, diagnostics
+
+
+def gibbs_chain(task):
+    """
+    Runs one Gibbs sampling chain of `sweeps` sweeps, starting from a
+    forward sample. After `burn_in` sweeps, every sweep adds each
+    person's conditional distribution to the current batch. Returns the
+    mean outcomes of each of the `batches` batches, which must be at most
+    `sweeps`.
+    """
+    people, sweeps, burn_in, batches, seed = task
+    pedigree = Pedigree(people)
+    rng = random.Random(seed)
+
+    assignment = {}
+    for person in pedigree.order:
+        distribution = [
+            pedigree.gene_probability(person, genes, assignment)
+            for genes in range(3)
+        ]
+        assignment[person] = sample_genes(distribution, rng)
+
+    # Batch b ends after sweeps * (b + 1) // batches sweeps, so batch
+    # sizes differ by at most one
+    means = []
+    size = 0
+    batch = {person: [0] * len(OUTCOMES) for person in people}
+    for sweep in range(burn_in + sweeps):
+        for person in pedigree.order:
+            distribution = pedigree.conditional(person, assignment)
+            assignment[person] = sample_genes(distribution, rng)
+            if sweep >= burn_in:
+                for i, x in enumerate(pedigree.outcomes(person, distribution)):
+                    batch[person][i] += x
+        if sweep < burn_in:
+            continue
+
+        size += 1
+        if sweep - burn_in + 1 == sweeps * (len(means) + 1) // batches:
+            means.append({
+                person: [x / size for x in values]
+                for person, values in batch.items()
+            })
+            size = 0
+            batch = {person: [0] * len(OUTCOMES) for person in people}
+    return means
+
+
+def rhat(chains):
+    """
+    Returns the potential scale reduction factor of a quantity, given the
+    batch means of each chain, or None if it cannot be estimated.
+    """
+    m, n = len(chains), len(chains[0])
+    if m < 2 or n < 2:
+        return None
+    means = [sum(chain) / n for chain in chains]
+    within = sum(
+        sum((x - mean) ** 2 for x in chain) / (n - 1)
+        for chain, mean in zip(chains, means)
+    ) / m
+    if within == 0:
+        return None
+    grand = sum(means) / m
+    between = n * sum((mean - grand) ** 2 for mean in means) / (m - 1)
+    return math.sqrt(((n - 1) / n * within + between / n) / within)
+
+
+def gibbs(people, samples=8000, burn_in=200, seed=None, chains=4,
+          processes=None, batches=20):
+    """
+    Estimates gene and trait probabilities by Gibbs sampling with `samples`
+    sweeps in all after burn-in, split over `chains` chains, on a process
+    pool if `processes` is not 1. Returns the probabilities, batch means
+    standard errors in the same structure, and diagnostics with the
+    largest R-hat over all outcomes after each batch.
+    """
+    rng = random.Random(seed)
+
+    # Every chain needs at least one sweep per batch
+    chains = max(1, min(chains, samples))
+    batches = max(1, min(batches, samples // chains))
+    tasks = [
+        (people, samples // chains + (i < samples % chains), burn_in,
+         batches, rng.randrange(2 ** 32))
+        for i in range(chains)
+    ]
+    results = run(gibbs_chain, tasks, processes)
+
+    probabilities = empty_probabilities(people)
+    errors = empty_probabilities(people)
+    for person in people:
+        for i, (field, value) in enumerate(OUTCOMES):
+            values = [means[person][i] for chain in results for means in chain]
+            mean = sum(values) / len(values)
+            variance = sum((x - mean) ** 2 for x in values) / max(len(values) - 1, 1)
+            probabilities[person][field][value] = mean
+            errors[person][field][value] = math.sqrt(variance / len(values))
+
+    # Convergence after every batch, using the batches seen so far
+    history = []
+    for n in range(2, len(results[0]) + 1):
+        values = [
+            rhat([[means[person][i] for means in chain[:n]] for chain in results])
+            for person in people
+            for i in range(len(OUTCOMES))
+        ]
+        values = [value for value in values if value is not None]
+        history.append(max(values) if values else None)
+
+    return probabilities, errors, {"rhat": history}
+
+
+def run(function, tasks, processes=None):
+    """
+    Returns `function` applied to every task, on a process pool unless
+    `processes` is 1 or there is only one task.
+    """
+    if processes == 1 or len(tasks) == 1:
+        return [function(task) for task in tasks]
+    with multiprocessing.Pool(processes) as pool:
+        return pool.map(function, tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Estimate gene and trait probabilities by sampling.")
+    parser.add_argument("data", help="CSV file with the pedigree")
+    parser.add_argument("--method", choices=["likelihood", "gibbs"],
+                        default="gibbs")
+    parser.add_argument("--samples", type=int, default=8000,
+                        help="samples (likelihood) or sweeps (gibbs), "
+                             "split over all chains")
+    parser.add_argument("--burn-in", type=int, default=200)
+    parser.add_argument("--chains", type=int, default=4)
+    parser.add_argument("--processes", type=int, default=None,
+                        help="worker processes (default: number of CPUs)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    people = load_data(args.data)
+    if args.method == "likelihood":
+        probabilities, errors, diagnostics = likelihood_weighting(
+            people, args.samples, args.seed, args.chains, args.processes)
+        print(f"Effective sample size: {diagnostics['ess']:.0f}")
+    else:
+        probabilities, errors, diagnostics = gibbs(
+            people, args.samples, args.burn_in, args.seed, args.chains,
+            args.processes)
+        if diagnostics["rhat"] and diagnostics["rhat"][-1] is not None:
+            print(f"R-hat: {diagnostics['rhat'][-1]:.4f}")
+
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                e = errors[person][field][value]
+                print(f"    {value}: {p:.4f} ± {e:.4f}")
+
+
+if __name__ == "__main__":
+    main()
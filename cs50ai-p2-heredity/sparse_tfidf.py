@@ -0,0 +1,203 @@
+import argparse
+import os
+from array import array
+
+import numpy as np
+
+from tfid import tokenizer
+
+# Bytes per cell of the padded score blocks used to pick top terms, at
+# the peak of `block_terms`: the scores and two arrays of the positions
+# and values being scattered into them
+BYTES_PER_CELL = 24
+
+
+class CountMatrix():
+    """
+    Documents x vocabulary matrix of word counts in compressed sparse row
+    (CSR) form, built one document at a time. Row i holds the columns
+    `indices[indptr[i]:indptr[i + 1]]` with counts in `data`, in the
+    order the words first appear in the document.
+    """
+
+    def __init__(self):
+        self.vocabulary = dict()
+        self.words = []
+        self.documents = []
+        self.indptr = array("q", [0])
+        self.indices = array("i")
+        self.data = array("i")
+
+    def add(self, name, words):
+        """
+        Adds a document with the given list of words as a new row.
+        """
+        counts = dict()
+        for word in words:
+            column = self.vocabulary.get(word)
+            if column is None:
+                column = self.vocabulary[word] = len(self.words)
+                self.words.append(word)
+            counts[column] = counts.get(column, 0) + 1
+
+        self.documents.append(name)
+        self.indices.extend(counts.keys())
+        self.data.extend(counts.values())
+        self.indptr.append(len(self.indices))
+
+    def arrays(self):
+        """
+        Returns the indptr, indices and data arrays as NumPy arrays that
+        share memory with the matrix.
+        """
+        return (
+            np.frombuffer(self.indptr, dtype=np.int64),
+            np.frombuffer(self.indices, dtype=np.int32),
+            np.frombuffer(self.data, dtype=np.int32),
+        )
+
+
+def load_matrix(directory, words):
+    """
+    Returns the count matrix of every file in `directory`, using the
+    `words` function to extract words (see `tfid.tokenizer`). Texts are
+    dropped as soon as they are counted.
+    """
+    matrix = CountMatrix()
+    for filename in os.listdir(directory):
+        with open(os.path.join(directory, filename)) as f:
+            matrix.add(filename, words(f.read()))
+    return matrix
+
+
+def inverse_document_frequencies(matrix):
+    """
+    Returns the IDF of every column, from one bincount over the columns
+    of all non-zero entries.
+    """
+    indptr, indices, data = matrix.arrays()
+    frequencies = np.bincount(indices, minlength=len(matrix.words))
+    return np.log(len(matrix.documents) / frequencies)
+
+
+def blocks(indptr, budget):
+    """
+    Yields (start, stop) ranges of rows whose padded score block fits
+    in `budget` bytes. A single row too long for the budget is a block
+    of its own.
+    """
+    lengths = np.maximum(np.diff(indptr), 1)
+    most = max(1, budget // BYTES_PER_CELL)
+    start = 0
+    while start < len(lengths):
+        # Size of the block when it ends at each of the next rows
+        widths = np.maximum.accumulate(lengths[start:start + most])
+        sizes = np.arange(1, len(widths) + 1) * widths * BYTES_PER_CELL
+        stop = start + max(1, int(np.searchsorted(sizes, budget, side="right")))
+        yield start, stop
+        start = stop
+
+
+def block_terms(matrix, idfs, start, stop, k):
+    """
+    Returns the columns and scores of the top k terms of rows `start` to
+    `stop`, ordered by row, then score, then position, and how many of
+    them belong to each row. Temporaries are sized and freed so that the
+    padded block takes at most BYTES_PER_CELL bytes per cell.
+    """
+    indptr, indices, data = matrix.arrays()
+    lengths = np.diff(indptr[start:stop + 1])
+    rows, width = len(lengths), int(lengths.max())
+
+    # Scatter the scores of the block into a padded dense array, entry j
+    # of row i going to i * width + (j - indptr[i])
+    begin, end = indptr[start], indptr[stop]
+    scores = np.full((rows, width), -np.inf)
+    flat = np.arange(begin, end)
+    flat -= np.repeat(indptr[start:stop] - np.arange(rows) * width, lengths)
+    values = idfs[indices[begin:end]]
+    values *= data[begin:end]
+    scores.ravel()[flat] = values
+    del flat, values
+    valid = scores > -np.inf
+
+    # k-th largest score of each row, partitioning a negated copy in place
+    n = min(k, width)
+    kth = np.negative(scores)
+    kth.partition(n - 1, axis=1)
+    kth = -kth[:, n - 1, None]
+
+    # Everything above the k-th score plus as many of the ties as needed,
+    # earliest first
+    chosen = scores > kth
+    needed = n - chosen.sum(axis=1, keepdims=True)
+    ties = scores == kth
+    ties &= valid
+    del valid
+    ties &= np.cumsum(ties, axis=1, dtype=np.int32) <= needed
+    chosen |= ties
+    del ties
+
+    # Order the chosen cells by row, then score, then position
+    row, position = np.nonzero(chosen)
+    best = scores[row, position]
+    del scores
+    order = np.lexsort((position, -best, row))
+    columns = indices[indptr[start:stop][row] + position][order].tolist()
+    return columns, best[order].tolist(), chosen.sum(axis=1).tolist()
+
+
+def top_terms(matrix, idfs, k=5, budget=64 * 2 ** 20):
+    """
+    Yields each document name and its k (word, TF-IDF) pairs with the
+    highest scores, ties in the order the words appear, like
+    `tfid.top_terms`. Rows are scored in padded blocks of at most
+    `budget` bytes, and the top k of each row are found with a partition
+    instead of a full sort.
+    """
+    indptr = matrix.arrays()[0]
+    for start, stop in blocks(indptr, budget):
+        if indptr[stop] == indptr[start]:
+            for document in matrix.documents[start:stop]:
+                yield document, []
+            continue
+
+        columns, best, counts = block_terms(matrix, idfs, start, stop, k)
+        offset = 0
+        for document, count in zip(matrix.documents[start:stop], counts):
+            yield document, [
+                (matrix.words[column], score) for column, score in
+                zip(columns[offset:offset + count], best[offset:offset + count])
+            ]
+            offset += count
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Calculate top TF-IDF for a large corpus of documents.")
+    parser.add_argument("corpus", help="directory of text files")
+    parser.add_argument("--top", type=int, default=5,
+                        help="terms per document")
+    parser.add_argument("--fast", action="store_true",
+                        help="use the pure Python tokenizer")
+    parser.add_argument("--memory", type=float, default=64,
+                        help="MiB for scoring a block of documents")
+    args = parser.parse_args()
+
+    print("Loading data...")
+    matrix = load_matrix(args.corpus, tokenizer(fast=args.fast))
+
+    print("Calculating inverse document frequencies...")
+    idfs = inverse_document_frequencies(matrix)
+
+    print("Computing top terms...")
+    print()
+    for document, terms in top_terms(
+            matrix, idfs, args.top, int(args.memory * 2 ** 20)):
+        print(document)
+        for term, score in terms:
+            print(f"    {term}: {score:.4f}")
+
+
+if __name__ == "__main__":
+    main()
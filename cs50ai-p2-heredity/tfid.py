@@ -1,46 +1,45 @@
+import heapq
 import sys
 import os
 import math
-import nltk
-nltk.download('punkt')
+import re
+
+# Characters the fast tokenizer splits words on, besides whitespace
+SEPARATORS = re.compile(r"[\s,;@#$%&?!()\[\]{}<>\"‘’“”—]+|--|:(?!\d)")
+
+# Contractions that word_tokenize splits off the end of a word
+CONTRACTION = re.compile(r"^(.+?)(n't|'s|'re|'ve|'ll|'d|'m)$", re.IGNORECASE)
+
+# Words that word_tokenize splits in two
+COMPOUND = re.compile(
+    r"^(can)(not)$|^(gon|wan)(na)$|^(got)(ta)$|^(gim|lem)(me)$", re.IGNORECASE
+)
+
+# From the first to the last word character or hyphen of a token
+WORD = re.compile(r"[\w-](?:.*[\w-])?", re.DOTALL)
 
 
 def main():
     """Calculate top TF-IDF for a corpus of documents."""
 
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python tfidf.py corpus")
+    if len(sys.argv) not in [2, 3] or sys.argv[2:] not in [[], ["--fast"]]:
+        sys.exit("Usage: python tfidf.py corpus [--fast]")
     print("Loading data...")
-    corpus = load_data(sys.argv[1])
+    corpus = load_data(sys.argv[1], tokenizer(fast=len(sys.argv) == 3))
 
-    # Get all words in corpus
+    # Count in how many documents each word appears
     print("Extracting words from corpus...")
-    words = set()
-    for filename in corpus:
-        words.update(corpus[filename])
+    frequencies = document_frequencies(corpus)
 
     # Calculate IDFs
     print("Calculating inverse document frequencies...")
-    idfs = dict()
-    for word in words:
-        f = sum(word in corpus[filename] for filename in corpus)
-        idf = math.log(len(corpus) / f)
-        idfs[word] = idf
-
-    # Calculate TF-IDFs
-    print("Calculating term frequencies...")
-    tfidfs = dict()
-    for filename in corpus:
-        tfidfs[filename] = []
-        for word in corpus[filename]:
-            tf = corpus[filename][word]
-            tfidfs[filename].append((word, tf * idfs[word]))
+    idfs = inverse_document_frequencies(frequencies, len(corpus))
 
-    # Sort and get top 5 TF-IDFs for each file
+    # Get top 5 TF-IDFs for each file
     print("Computing top terms...")
+    tfidfs = dict()
     for filename in corpus:
-        tfidfs[filename].sort(key=lambda tfidf: tfidf[1], reverse=True)
-        tfidfs[filename] = tfidfs[filename][:5]
+        tfidfs[filename] = top_terms(corpus[filename], idfs, 5)
 
     # Print results
     print()
@@ -50,17 +49,117 @@ def main():
             print(f"    {term}: {score:.4f}")
 
 
-def load_data(directory):
+def document_frequencies(corpus):
+    """
+    Returns a dictionary mapping each word in the corpus to the number of
+    documents it appears in, from one pass over each document's words.
+    """
+    frequencies = dict()
+    for filename in corpus:
+        for word in corpus[filename]:
+            frequencies[word] = frequencies.get(word, 0) + 1
+    return frequencies
+
+
+def inverse_document_frequencies(frequencies, documents):
+    """
+    Returns the IDF of every word, given its document frequency and the
+    total number of documents.
+    """
+    return {
+        word: math.log(documents / f)
+        for word, f in frequencies.items()
+    }
+
+
+def top_terms(frequencies, idfs, k=5):
+    """
+    Returns the k (word, TF-IDF) pairs with the highest scores in a
+    document, ties in the order the words appear.
+    """
+    return heapq.nlargest(
+        k,
+        ((word, tf * idfs[word]) for word, tf in frequencies.items()),
+        key=lambda tfidf: tfidf[1]
+    )
+
+
+def tokenizer(fast=False):
+    """
+    Returns a function that extracts the lowercase alphabetic words of a
+    text. Uses NLTK's word_tokenize if NLTK and its punkt data are already
+    installed, without ever downloading anything, and the pure Python
+    `fast_words` otherwise or if `fast` is set.
+    """
+    if not fast:
+        try:
+            import nltk
+            for resource in ["tokenizers/punkt_tab", "tokenizers/punkt"]:
+                try:
+                    nltk.data.find(resource)
+                    break
+                except LookupError:
+                    continue
+            else:
+                raise LookupError("punkt")
+
+            # Loads the tokenizer data this version of NLTK actually uses
+            nltk.word_tokenize("Loaded.")
+            return nltk_words
+        except (ImportError, LookupError):
+            pass
+    return fast_words
+
+
+def nltk_words(text):
+    """
+    Returns the lowercase alphabetic words of `text`, using NLTK.
+    """
+    import nltk
+    return [
+        word.lower() for word in
+        nltk.word_tokenize(text)
+        if word.isalpha()
+    ]
+
+
+def fast_words(text):
+    """
+    Returns the lowercase alphabetic words of `text`, close to what
+    `nltk_words` returns: punctuation around words and contractions such
+    as n't and 's are split off, words like cannot are split in two, and
+    tokens that still contain anything but letters (e.g. well-known, U.S.,
+    3rd, __init__) are dropped.
+    """
+    words = []
+    for token in SEPARATORS.split(text):
+        match = WORD.search(token)
+        if match is None:
+            continue
+        word = match.group()
+        contraction = CONTRACTION.match(word)
+        if contraction:
+            word = contraction.group(1)
+        compound = COMPOUND.match(word)
+        parts = [p for p in compound.groups() if p] if compound else [word]
+        words.extend(part.lower() for part in parts if part.isalpha())
+    return words
+
+
+def load_data(directory, words=None):
+    """
+    Returns the word frequencies of every file in `directory`, using the
+    `words` function to extract words (see `tokenizer`).
+    """
+    if words is None:
+        words = tokenizer()
+
     files = dict()
     for filename in os.listdir(directory):
         with open(os.path.join(directory, filename)) as f:
 
             # Extract words
-            contents = [
-                word.lower() for word in
-                nltk.word_tokenize(f.read())
-                if word.isalpha()
-            ]
+            contents = words(f.read())
 
             # Count frequencies
             frequencies = dict()
@@ -0,0 +1,123 @@
+import itertools
+
+import numpy as np
+
+from heredity import PROBS, empty_probabilities, inheritance_probability, normalize
+
+# Gene assignments handled per batch, bounds memory to a few MB per person
+CHUNK_SIZE = 3 ** 10
+
+
+def tables(people, names):
+    """
+    Returns the arrays describing the pedigree: index of each person's
+    mother and father (-1 for founders), the founder gene prior, the
+    inheritance table indexed by [child, mother, father] gene counts, and
+    the likelihood of each person's known trait for every gene count.
+    """
+    index = {name: i for i, name in enumerate(names)}
+    mothers = np.array([
+        index[people[name]["mother"]] if people[name]["mother"] is not None else -1
+        for name in names
+    ], dtype=np.intp)
+    fathers = np.array([
+        index[people[name]["father"]] if people[name]["father"] is not None else -1
+        for name in names
+    ], dtype=np.intp)
+
+    prior = np.array([PROBS["gene"][genes] for genes in range(3)])
+    inheritance = np.empty((3, 3, 3))
+    for genes, mother, father in itertools.product(range(3), repeat=3):
+        inheritance[genes, mother, father] = inheritance_probability(
+            genes, mother, father
+        )
+
+    likelihood = np.ones((len(names), 3))
+    for i, name in enumerate(names):
+        trait = people[name]["trait"]
+        if trait is not None:
+            likelihood[i] = [PROBS["trait"][genes][trait] for genes in range(3)]
+
+    return mothers, fathers, prior, inheritance, likelihood
+
+
+def assignments(n, start, stop):
+    """
+    Returns the gene assignments numbered `start` to `stop` as an integer
+    array of shape (stop - start, n), reading each number in base 3.
+    """
+    codes = np.arange(start, stop, dtype=np.int64)
+    powers = 3 ** np.arange(n, dtype=np.int64)
+    return (codes[:, None] // powers) % 3
+
+
+def log_joint_probabilities(genes, mothers, fathers, prior, inheritance,
+                            likelihood):
+    """
+    Returns the log joint probability of every row of gene assignments
+    `genes` together with the known traits.
+    """
+    founders = np.flatnonzero(mothers < 0)
+    children = np.flatnonzero(mothers >= 0)
+
+    p = np.empty(genes.shape)
+    p[:, founders] = prior[genes[:, founders]]
+    p[:, children] = inheritance[
+        genes[:, children],
+        genes[:, mothers[children]],
+        genes[:, fathers[children]]
+    ]
+    p *= likelihood[np.arange(genes.shape[1]), genes]
+    with np.errstate(divide="ignore"):
+        return np.log(p).sum(axis=1)
+
+
+def infer(people, chunk_size=CHUNK_SIZE):
+    """
+    Computes gene and trait probabilities for each person by evaluating
+    all 3^n gene assignments as arrays, `chunk_size` assignments at a time.
+    """
+    names = list(people)
+    n = len(names)
+    pedigree = tables(people, names)
+
+    # Unnormalized gene distribution, flattened as person * 3 + genes.
+    # Totals are kept relative to exp(shift), the largest joint probability
+    # seen so far, so that they never underflow.
+    totals = np.zeros(3 * n)
+    shift = -np.inf
+    offsets = 3 * np.arange(n)
+    for start in range(0, 3 ** n, chunk_size):
+        genes = assignments(n, start, min(start + chunk_size, 3 ** n))
+        log_p = log_joint_probabilities(genes, *pedigree)
+        largest = log_p.max()
+        if largest > shift:
+            if shift > -np.inf:
+                totals *= np.exp(shift - largest)
+            shift = largest
+        p = np.exp(log_p - shift)
+        totals += np.bincount(
+            (genes + offsets).ravel(),
+            weights=np.repeat(p, n),
+            minlength=3 * n
+        )
+    totals = totals.reshape(n, 3)
+
+    probabilities = empty_probabilities(people)
+    for i, name in enumerate(names):
+        for genes in range(3):
+            probabilities[name]["gene"][genes] = float(totals[i, genes])
+
+        # Traits only depend on genes, so they follow from the gene totals
+        trait = people[name]["trait"]
+        if trait is not None:
+            probabilities[name]["trait"][trait] = 1
+        else:
+            for value in (True, False):
+                probabilities[name]["trait"][value] = float(sum(
+                    totals[i, genes] * PROBS["trait"][genes][value]
+                    for genes in range(3)
+                ))
+
+    normalize(probabilities)
+    return probabilities